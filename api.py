@@ -1,16 +1,17 @@
 import asyncio
+import hashlib
+import hmac
 import logging
 import os
 import time
-from datetime import datetime, timezone
-from fastapi import HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
-from fastapi.responses import HTMLResponse, JSONResponse
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import or_, select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from config import SUPPORT_CHAT_URL, USERNAME_BOT, WEBHOOK_HOST, PROJECT_NAME, DATABASE_URL, HAPP_CRYPTOLINK, SUPERNODE
-from database.models import Key, Server
+from sqlalchemy import select
+from config import SUPPORT_CHAT_URL, USERNAME_BOT, WEBHOOK_HOST, PROJECT_NAME, HAPP_CRYPTOLINK, SUPERNODE
+from database.models import Key
 import re
 
 from panels._3xui import get_vless_link_for_client, get_xui_instance
@@ -24,8 +25,23 @@ from .settings import (
     APPS_ENABLED, DEEPLINKS, APP_LINKS, BUTTONS_ENABLED, CURRENT_THEME, LANGUAGE_MODE, FALLBACK_LANGUAGE, BASE_PATH,
     RATE_LIMIT_ENABLED, RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD, RATE_LIMIT_BLOCK_TIME, HAPTIC_ENABLED, VLESS_SELECTOR_ENABLED,
     WEBAPP_DOMAIN, CDN_DOMAIN, GRADIENT_THEME_COLORS,
-    HOLIDAYS_ENABLED, HOLIDAYS_USER_CAN_DISABLE, HOLIDAYS, EASTER_DATES, EASTER_CONFIG
+    HOLIDAYS_ENABLED, HOLIDAYS_USER_CAN_DISABLE,
+    RATE_LIMIT_MAX_TRACKED_IPS, RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH, INDEX_RELOAD_INTERVAL, PANEL_TIMEOUT,
+    INLINE_INITIAL_DATA, ASSET_BUNDLING, VENDOR_ASSETS, METRICS_ENABLED, METRICS_TOKEN
 )
+from .assets import build_bundles, feature_scripts, media_type_for, script_tags, style_tags
+from .cache import key_cache, inbound_cache, country_links_cache
+from .db import module_database
+from .holidays import resolve_active_holiday
+from . import metrics, tracing
+from .http_cache import PrecompressedPayload, compressed_response, etag_matches, make_etag
+from .page import IndexPage, read_version
+from .payloads import IMMUTABLE_CACHE, JsonSnapshot, TextsPayloads, cache_control_for, dump_json, inline_json
+from .qr import qr_renderer, QR_FORMATS, QR_DEFAULT_SIZE, QR_MIN_SIZE, QR_MAX_SIZE
+from .ratelimit import create_rate_limiter
+from .topology import topology
+from .tv import tv_client
+from .vendor import content_security_policy, resolve_vendor_assets, vendor_feature_scripts, vendor_tags
 
 BACKEND_DOMAIN = WEBAPP_DOMAIN if WEBAPP_DOMAIN else WEBHOOK_HOST
 BUTTON_DOMAIN = CDN_DOMAIN if CDN_DOMAIN else BACKEND_DOMAIN
@@ -35,10 +51,14 @@ if not BASE_PATH.endswith('/'):
     BASE_PATH = BASE_PATH + '/'
 from .texts import STATIC_TEXTS, DINAMIC_TEXTS
 
-rate_limit_storage = {
-    "requests": {},
-    "blocked": {}
-}
+rate_limiter = create_rate_limiter(
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REQUESTS,
+    RATE_LIMIT_PERIOD,
+    RATE_LIMIT_BLOCK_TIME,
+    RATE_LIMIT_MAX_TRACKED_IPS,
+    RATE_LIMIT_SQLITE_PATH,
+)
 
 def get_client_ip(request: Request) -> str:
     forwarded = request.headers.get("X-Forwarded-For")
@@ -49,56 +69,277 @@ def get_client_ip(request: Request) -> str:
         return real_ip
     return request.client.host if request.client else "unknown"
 
-def check_rate_limit(ip: str) -> bool:
+async def check_rate_limit(ip: str) -> bool:
     if not RATE_LIMIT_ENABLED:
         return True
+    try:
+        return await rate_limiter.allow(ip)
+    except Exception as e:
+        # Сбой хранилища лимитов не должен ронять страницу
+        logging.error(f"[Subscription Page] Rate limit store error: {e}")
+        return True
 
-    current_time = time.time()
-
-    if ip in rate_limit_storage["blocked"]:
-        block_until = rate_limit_storage["blocked"][ip]
-        if current_time < block_until:
-            return False
-        else:
-            del rate_limit_storage["blocked"][ip]
-
-    if ip not in rate_limit_storage["requests"]:
-        rate_limit_storage["requests"][ip] = []
-
-    rate_limit_storage["requests"][ip] = [
-        req_time for req_time in rate_limit_storage["requests"][ip]
-        if current_time - req_time < RATE_LIMIT_PERIOD
-    ]
-
-    if len(rate_limit_storage["requests"][ip]) >= RATE_LIMIT_REQUESTS:
-        rate_limit_storage["blocked"][ip] = current_time + RATE_LIMIT_BLOCK_TIME
-        logging.warning(f"[Subscription Page] IP {ip} blocked for {RATE_LIMIT_BLOCK_TIME}s")
-        return False
-
-    rate_limit_storage["requests"][ip].append(current_time)
-    return True
-
-
-_module_engine = None
-_module_session_maker = None
 
 def get_module_session_maker():
-    global _module_engine, _module_session_maker
-    if _module_session_maker is None:
-        _module_engine = create_async_engine(
-            DATABASE_URL,
-            echo=False,
-            future=True,
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=15
+    return module_database.get_session_maker()
+
+async def _load_key_snapshot(key_name):
+    session_maker = get_module_session_maker()
+    with metrics.db_session_latency.time("key_lookup"), tracing.span("db_key"):
+        async with session_maker() as session:
+            query = select(Key).where(
+                Key.email == key_name,
+                Key.is_frozen == False
+            ).limit(1)
+
+            result = await session.execute(query)
+            row = result.scalar_one_or_none()
+
+        if not row:
+            return None
+
+        return {
+            "email": getattr(row, "email", ""),
+            "key": row.key,
+            "remnawave_link": getattr(row, "remnawave_link", None),
+            "expiry_time": row.expiry_time,
+            "server_id": row.server_id,
+        }
+
+async def get_key_snapshot(key_name):
+    return await key_cache.get_or_load(key_name, lambda: _load_key_snapshot(key_name))
+
+async def build_subscription(key_name):
+    snapshot = await get_key_snapshot(key_name)
+    if not snapshot:
+        return None
+
+    expiry_iso = datetime.fromtimestamp(snapshot["expiry_time"] / 1000, timezone.utc).isoformat()
+    remnawave_link = snapshot["remnawave_link"]
+
+    if HAPP_CRYPTOLINK and remnawave_link:
+        primary_link = remnawave_link
+        is_crypto_link = True
+    else:
+        primary_link = snapshot["key"] or remnawave_link
+        is_crypto_link = False
+
+    return {
+        "key": snapshot["key"],
+        "expiry": expiry_iso,
+        "link": primary_link,
+        "email": snapshot["email"],
+        "is_crypto_link": is_crypto_link,
+        "remnawave_link": remnawave_link if HAPP_CRYPTOLINK else None,
+    }
+
+# Метка панели в метриках: адрес панели (с путём и портом) наружу не отдаём
+def _panel_label(server):
+    if server.server_name:
+        return server.server_name
+    return "panel-" + hashlib.blake2b((server.api_url or "").encode(), digest_size=4).hexdigest()
+
+async def _load_inbound(get_xui, inbound_id):
+    xui = await get_xui()
+    with tracing.span("xui_inbound"):
+        inbound = await xui.inbound.get_by_id(int(inbound_id))
+    if not inbound:
+        return None
+    return {
+        "remark": getattr(inbound, 'remark', None),
+        "port": getattr(inbound, 'port', None),
+    }
+
+async def build_country_entry(server, key_name):
+    inbound_id = server.inbound_id
+    if not inbound_id or not server.api_url:
+        return None
+
+    login_email = f"{key_name}_{server.server_name.lower()}" if SUPERNODE and server.server_name else key_name
+
+    # Вход в панель выполняется не больше одного раза за сборку: экземпляр нужен и при
+    # промахе кеша inbound'ов, и для ссылки VLESS
+    xui = None
+
+    async def get_xui():
+        nonlocal xui
+        if xui is None:
+            with tracing.span("xui_login"):
+                xui = await get_xui_instance(server.api_url)
+        return xui
+
+    try:
+        inbound = await inbound_cache.get_or_load(
+            (server.api_url, int(inbound_id)),
+            lambda: _load_inbound(get_xui, inbound_id),
         )
-        _module_session_maker = async_sessionmaker(
-            bind=_module_engine,
-            expire_on_commit=False,
-            class_=AsyncSession
+        if not inbound:
+            return None
+
+        country_name = inbound["remark"] or server.server_name or 'Server'
+        host_source = server.subscription_url or server.api_url
+        host = extract_host(host_source)
+        port = inbound["port"]
+        if not host or not port:
+            return None
+
+        link_remark = f"{country_name}-{key_name}"
+        panel = await get_xui()
+        with tracing.span("xui_link"):
+            link = await get_vless_link_for_client(
+                xui=panel,
+                inbound_id=int(inbound_id),
+                email=login_email,
+                external_host=host,
+                port=int(port),
+                remark=link_remark,
+            )
+        if not link:
+            return None
+
+        return {
+            "country": str(country_name),
+            "link": link,
+            "server_name": server.server_name,
+        }
+    except Exception as ex:
+        metrics.panel_errors.inc(_panel_label(server), "error")
+        logging.warning(
+            f"[Subscription Page] Failed to build country link for {server.server_name}: {ex}"
         )
-    return _module_session_maker
+        return None
+
+async def _build_country_entry_with_timeout(server, key_name):
+    # Одна медленная панель не должна задерживать весь ответ
+    panel = _panel_label(server)
+    try:
+        with metrics.panel_latency.time(panel):
+            return await asyncio.wait_for(build_country_entry(server, key_name), PANEL_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.panel_errors.inc(panel, "timeout")
+        logging.warning(
+            f"[Subscription Page] Panel {server.server_name} did not answer in {PANEL_TIMEOUT}s"
+        )
+        return None
+
+async def _country_servers(key_name):
+    snapshot = await get_key_snapshot(key_name)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+
+    with tracing.span("servers"):
+        await topology.ensure_ready(get_module_session_maker())
+        return topology.servers_for(snapshot["server_id"])
+
+def _country_item(item):
+    if isinstance(item, dict):
+        return {"country": item["country"], "link": item["link"]}
+    if isinstance(item, Exception):
+        logging.warning(f"[Subscription Page] country-links task error: {item}")
+    return None
+
+def _sorted_countries(countries):
+    if not countries:
+        return None
+    return sorted(countries, key=lambda entry: entry["country"] or "")
+
+async def _build_country_links(key_name):
+    servers = await _country_servers(key_name)
+    if not servers:
+        return None
+
+    tasks = [_build_country_entry_with_timeout(server, key_name) for server in servers]
+    raw_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    return _sorted_countries([entry for entry in map(_country_item, raw_results) if entry])
+
+async def _collect_country_links(key_name, servers, on_entry):
+    # Как _build_country_links, но каждая страна передаётся в on_entry сразу, как ответила её панель.
+    # В конце on_entry(None)
+    countries = []
+    tasks = [asyncio.ensure_future(_build_country_entry_with_timeout(server, key_name)) for server in servers]
+    try:
+        for future in asyncio.as_completed(tasks):
+            try:
+                entry = _country_item(await future)
+            except Exception as e:
+                entry = _country_item(e)
+            if entry:
+                countries.append(entry)
+                on_entry(entry)
+        return _sorted_countries(countries)
+    finally:
+        on_entry(None)
+        for task in tasks:
+            task.cancel()
+
+async def _stream_country_links(key_name, servers):
+    # NDJSON: строка на каждую страну в порядке готовности панелей, в конце строка {"done": ...}.
+    # Сборка регистрируется в кеше как текущая загрузка ключа: параллельные запросы (и потоковые,
+    # и обычный /api/country-links) ждут её, а не опрашивают панели заново. Если клиент ушёл,
+    # сборка доводится до конца ради кеша и остальных ожидающих
+    entries = asyncio.Queue()
+    task, started = country_links_cache.load(
+        key_name, lambda: _collect_country_links(key_name, servers, entries.put_nowait)
+    )
+    if not started:
+        countries = await asyncio.shield(task)
+        async for line in _stream_cached_countries(countries):
+            yield line
+        return
+
+    count = 0
+    while True:
+        entry = await entries.get()
+        if entry is None:
+            break
+        count += 1
+        yield dump_json(entry) + b"\n"
+    await task
+    yield dump_json({"done": True, "count": count}) + b"\n"
+
+async def _stream_cached_countries(countries):
+    for entry in countries or ():
+        yield dump_json(entry) + b"\n"
+    yield dump_json({"done": True, "count": len(countries or ())}) + b"\n"
+
+def build_settings_content(today=None):
+    return {
+        "project_name": PROJECT_NAME,
+        "bot_username": USERNAME_BOT,
+        "support_chat": SUPPORT_CHAT_URL,
+        "webhook_host": BUTTON_DOMAIN,
+        "base_path": BASE_PATH,
+        "color_theme": CURRENT_THEME,
+        "gradient_colors": GRADIENT_THEME_COLORS,
+        "language": {
+            "default_mode": LANGUAGE_MODE,
+            "fallback": FALLBACK_LANGUAGE
+        },
+        "apps": APPS_ENABLED,
+        "deeplinks": DEEPLINKS,
+        "app_links": APP_LINKS,
+        "buttons": BUTTONS_ENABLED,
+        "happ_cryptolink": HAPP_CRYPTOLINK,
+        "haptic_enabled": HAPTIC_ENABLED,
+        "vless_selector_enabled": VLESS_SELECTOR_ENABLED,
+        "holidays": {
+            "enabled": HOLIDAYS_ENABLED,
+            "user_can_disable": HOLIDAYS_USER_CAN_DISABLE,
+            # Вместо всех таблиц праздников клиент получает только сегодняшний
+            "active": resolve_active_holiday(today)
+        }
+    }
+
+def pick_language(request: Request):
+    if LANGUAGE_MODE in STATIC_TEXTS:
+        return LANGUAGE_MODE
+    # Для режима "user" ориентируемся на Accept-Language, страница сверит язык сама
+    for part in request.headers.get("accept-language", "").split(","):
+        code = part.split(";")[0].strip().lower()[:2]
+        if code in STATIC_TEXTS:
+            return code
+    return FALLBACK_LANGUAGE
 
 def get_all_texts(language="ru"):
     texts = {}
@@ -106,6 +347,20 @@ def get_all_texts(language="ru"):
     texts.update(DINAMIC_TEXTS.get(language, DINAMIC_TEXTS["ru"]))
     return texts
 
+# Ресурсы, которые живут столько же, сколько приложение: топология серверов, HTTP-клиент TV и пул базы
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        await topology.refresh(get_module_session_maker())
+    except Exception as e:
+        logging.error(f"[Subscription Page] Failed to build server topology at startup: {e}")
+    await tv_client.start()
+    try:
+        yield
+    finally:
+        await tv_client.close()
+        await module_database.dispose()
+
 def create_api_routes(app, module_path):
 
     allowed_origins = [BACKEND_DOMAIN]
@@ -121,51 +376,162 @@ def create_api_routes(app, module_path):
         allow_headers=["*"],
     )
 
+    static_path = os.path.join(module_path, "static")
+    vendor_assets = resolve_vendor_assets(static_path, VENDOR_ASSETS)
+    # CSP разрешает только те CDN, с которых страница действительно что-то загружает
+    csp = content_security_policy(vendor_assets)
+
+    # Маршруты, для которых собираются метрики (путь -> метка route)
+    metric_routes = {
+        BASE_PATH: "index",
+        f"{BASE_PATH}api/sub": "api/sub",
+        f"{BASE_PATH}api/bootstrap": "api/bootstrap",
+        f"{BASE_PATH}api/country-links": "api/country-links",
+        f"{BASE_PATH}api/country-links/stream": "api/country-links/stream",
+        f"{BASE_PATH}api/qr": "api/qr",
+        f"{BASE_PATH}api/tv": "api/tv",
+    }
+
     @app.middleware("http")
     async def add_security_headers(request: Request, call_next):
-        response = await call_next(request)
-
-        response.headers["Content-Security-Policy"] = (
-            "frame-ancestors 'self' https://web.telegram.org https://telegram.org; "
-            "script-src 'self' 'unsafe-inline' https://telegram.org https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-            "style-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com https://cdn.tailwindcss.com"
-        )
+        route = metric_routes.get(request.url.path)
+        if route is None:
+            response = await call_next(request)
+        else:
+            started = time.perf_counter()
+            trace = tracing.start(route)
+            try:
+                response = await call_next(request)
+            except Exception:
+                metrics.http_requests.inc(route, "500")
+                raise
+            metrics.http_latency.observe(time.perf_counter() - started, route)
+            metrics.http_requests.inc(route, str(response.status_code))
+            if trace is not None:
+                tracing.finish(trace, response)
+
+        response.headers["Content-Security-Policy"] = csp
 
         response.headers["X-Content-Type-Options"] = "nosniff"
         response.headers["X-XSS-Protection"] = "1; mode=block"
 
         return response
 
-    @app.get(f"{BASE_PATH}", response_class=HTMLResponse)
-    async def device_connector_index():
-        html_path = os.path.join(module_path, "static", "index.html")
-        version_path = os.path.join(module_path, "VERSION")
-
-        version = "1.0.0"
-        if os.path.exists(version_path):
-            with open(version_path, encoding="utf-8") as f:
-                version = f.read().strip()
+    # JS и CSS собираются в бандлы с хешем содержимого в имени: один запрос вместо тридцати,
+    # а после обновления перекачиваются только изменившиеся бандлы
+    asset_manifest = None
+    asset_payloads = {}
+    if ASSET_BUNDLING:
+        try:
+            asset_manifest, asset_files = build_bundles(static_path)
+            asset_payloads = {
+                filename: PrecompressedPayload(body, media_type_for(filename))
+                for filename, body in asset_files.items()
+            }
+            logging.info(f"[Subscription Page] Static bundles built: {', '.join(asset_manifest.values())}")
+        except Exception as e:
+            logging.error(f"[Subscription Page] Failed to build static bundles, serving separate files: {e}")
+            asset_manifest = None
+
+    asset_version = read_version(os.path.join(module_path, "VERSION"))
+
+    # Сторонние библиотеки части (jsQR для сканера) загружаются раньше её собственного скрипта
+    lazy_features = feature_scripts(BASE_PATH, asset_version, asset_manifest)
+    for feature, urls in vendor_feature_scripts(BASE_PATH, asset_version, vendor_assets).items():
+        lazy_features[feature] = urls + lazy_features.get(feature, [])
+
+    index_page = IndexPage(
+        os.path.join(module_path, "static", "index.html"),
+        os.path.join(module_path, "VERSION"),
+        {
+            "PROJECT_NAME": PROJECT_NAME,
+            "WEBHOOK_HOST": BUTTON_DOMAIN,
+            "SUPPORT_CHAT_URL": SUPPORT_CHAT_URL,
+            "USERNAME_BOT": USERNAME_BOT,
+            "BASE_PATH": BASE_PATH,
+            "VENDOR_TAGS": vendor_tags(BASE_PATH, asset_version, vendor_assets),
+            "STYLE_TAGS": style_tags(BASE_PATH, asset_version, asset_manifest),
+            "SCRIPT_TAGS": script_tags(BASE_PATH, asset_version, asset_manifest),
+            "FEATURES_JSON": inline_json(dump_json(lazy_features)),
+        },
+        reload_interval=INDEX_RELOAD_INTERVAL,
+    )
 
-        if os.path.exists(html_path):
-            with open(html_path, encoding="utf-8") as f:
-                content = f.read()
+    # Настройки сериализуются один раз и встраиваются в index.html. Активный праздник
+    # зависит от даты, поэтому снимок пересобирается при смене дня
+    settings_state = {"day": None, "snapshot": None}
+
+    def current_settings():
+        today = date.today()
+        if settings_state["day"] != today:
+            snapshot = JsonSnapshot("settings", build_settings_content(today))
+            settings_state["day"] = today
+            settings_state["snapshot"] = snapshot
+            index_page.update_context({"SETTINGS_JSON": snapshot.inline, "SETTINGS_VERSION": snapshot.version})
+        return settings_state["snapshot"]
+
+    current_settings()
+
+    texts_payloads = TextsPayloads(
+        index_page.version,
+        get_all_texts,
+        sorted(set(STATIC_TEXTS) | set(DINAMIC_TEXTS)),
+    )
 
-            content = content.replace("{{PROJECT_NAME}}", PROJECT_NAME)
-            content = content.replace("{{WEBHOOK_HOST}}", BUTTON_DOMAIN)
-            content = content.replace("{{SUPPORT_CHAT_URL}}", SUPPORT_CHAT_URL)
-            content = content.replace("{{USERNAME_BOT}}", USERNAME_BOT)
-            content = content.replace("{{BASE_PATH}}", BASE_PATH)
-            content = content.replace("{{VERSION}}", version)
+    async def load_initial_subscription(key_name):
+        if not key_name:
+            return None, 400
+        try:
+            subscription = await build_subscription(key_name)
+            return subscription, (None if subscription else 404)
+        except Exception as e:
+            logging.error(f"[Subscription Page] Database error: {e}")
+            return None, 500
+
+    async def render_index_with_data(request: Request, key_name):
+        subscription, subscription_error = await load_initial_subscription(key_name)
+        # Тексты экранированы заранее, на каждый запрос экранируется только подписка
+        inline = b"".join((
+            b'{"texts":', texts_payloads.inline(pick_language(request)),
+            b',"subscription":', inline_json(dump_json(subscription)).encode("utf-8"),
+            b',"subscription_error":', dump_json(subscription_error),
+            b'}',
+        ))
+        return index_page.render_inline(inline)
 
-            return HTMLResponse(content=content)
+    @app.get(f"{BASE_PATH}", response_class=HTMLResponse)
+    async def device_connector_index(request: Request, key_name: str = Query(None)):
+        current_settings()
+        payload = index_page.get()
+        if payload is not None:
+            # Данные подписки встраиваются в страницу, чтобы не ждать отдельного запроса.
+            # При превышении лимита отдаём обычную страницу, она загрузит данные сама
+            if INLINE_INITIAL_DATA and key_name and await check_rate_limit(get_client_ip(request)):
+                body = await render_index_with_data(request, key_name)
+                if body is not None:
+                    etag = make_etag(body)
+                    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+                    if etag_matches(request, etag):
+                        return Response(status_code=304, headers=headers)
+                    return compressed_response(request, body, "text/html", headers)
+
+            return payload.response(request, cache_control="no-cache")
 
         return HTMLResponse(content=f"<h1>Подключение устройства</h1><p>Модуль xui_subpage активирован для {PROJECT_NAME}</p>")
 
+    # Регистрируется раньше монтирования StaticFiles, поэтому бандлы отдаются из памяти
+    @app.get(f"{BASE_PATH}static/dist/{{filename}}")
+    async def get_asset_bundle(request: Request, filename: str):
+        payload = asset_payloads.get(filename)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        return payload.response(request, cache_control=IMMUTABLE_CACHE)
+
     @app.get(f"{BASE_PATH}api/sub")
     async def get_sub(request: Request, key_name=Query(None)):
 
         client_ip = get_client_ip(request)
-        if not check_rate_limit(client_ip):
+        if not await check_rate_limit(client_ip):
             raise HTTPException(
                 status_code=429,
                 detail="Too many requests. Please try again in 5 minutes."
@@ -175,36 +541,11 @@ def create_api_routes(app, module_path):
             raise HTTPException(status_code=400, detail="Required key_name parameter")
 
         try:
-            session_maker = get_module_session_maker()
-            async with session_maker() as session:
-                query = select(Key).where(
-                    Key.email == key_name,
-                    Key.is_frozen == False
-                ).limit(1)
-
-                result = await session.execute(query)
-                row = result.scalar_one_or_none()
-
-                if not row:
-                    raise HTTPException(status_code=404, detail="Subscription not found")
-                expiry_iso = datetime.fromtimestamp(row.expiry_time / 1000, timezone.utc).isoformat()
-                remnawave_link = getattr(row, "remnawave_link", None)
-
-                if HAPP_CRYPTOLINK and remnawave_link:
-                    primary_link = remnawave_link
-                    is_crypto_link = True
-                else:
-                    primary_link = row.key or remnawave_link
-                    is_crypto_link = False
-
-                return {
-                    "key": row.key,
-                    "expiry": expiry_iso,
-                    "link": primary_link,
-                    "email": getattr(row, "email", ""),
-                    "is_crypto_link": is_crypto_link,
-                    "remnawave_link": remnawave_link if HAPP_CRYPTOLINK else None,
-                }
+            subscription = await build_subscription(key_name)
+
+            if not subscription:
+                raise HTTPException(status_code=404, detail="Subscription not found")
+            return subscription
 
         except HTTPException:
             raise
@@ -212,11 +553,36 @@ def create_api_routes(app, module_path):
             logging.error(f"[Subscription Page] Database error: {e}")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+    @app.get(f"{BASE_PATH}api/bootstrap")
+    async def get_bootstrap(request: Request, key_name: str = Query(None), language: str = Query(None)):
+
+        client_ip = get_client_ip(request)
+        if not await check_rate_limit(client_ip):
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please try again in 5 minutes."
+            )
+
+        if not language:
+            language = pick_language(request)
+
+        subscription, subscription_error = await load_initial_subscription(key_name)
+
+        # Настройки и тексты уже сериализованы, собираем ответ из готовых байтов
+        body = b"".join((
+            b'{"settings":', current_settings().payload.body,
+            b',"texts":', texts_payloads.get(language).body,
+            b',"subscription":', dump_json(subscription),
+            b',"subscription_error":', dump_json(subscription_error),
+            b'}',
+        ))
+        return compressed_response(request, body, "application/json", {"Cache-Control": "no-store"})
+
     @app.get(f"{BASE_PATH}api/country-links")
     async def get_country_links(request: Request, key_name: str = Query(None)):
 
         client_ip = get_client_ip(request)
-        if not check_rate_limit(client_ip):
+        if not await check_rate_limit(client_ip):
             raise HTTPException(
                 status_code=429,
                 detail="Too many requests. Please try again in 5 minutes."
@@ -226,175 +592,54 @@ def create_api_routes(app, module_path):
             raise HTTPException(status_code=400, detail="Required key_name parameter")
 
         try:
-            session_maker = get_module_session_maker()
-            async with session_maker() as session:
-                key_stmt = select(Key).where(
-                    Key.email == key_name,
-                    Key.is_frozen == False
-                ).limit(1)
-
-                key_result = await session.execute(key_stmt)
-                key_row = key_result.scalar_one_or_none()
-
-                if not key_row:
-                    raise HTTPException(status_code=404, detail="Subscription not found")
-
-                server_identifier = key_row.server_id
-                base_server = None
-
-                if server_identifier:
-                    base_stmt = (
-                        select(Server)
-                        .where(
-                            or_(
-                                Server.cluster_name == server_identifier,
-                                Server.server_name == server_identifier,
-                            )
-                        )
-                        .limit(1)
-                    )
-                    base_server = (await session.execute(base_stmt)).scalar_one_or_none()
-
-                    if not base_server:
-                        by_group_stmt = (
-                            select(Server)
-                            .where(Server.tariff_group == server_identifier)
-                            .limit(1)
-                        )
-                        base_server = (await session.execute(by_group_stmt)).scalar_one_or_none()
-
-                tariff_group = base_server.tariff_group if base_server else None
-                cluster_name = base_server.cluster_name if base_server else None
-
-                if not cluster_name and server_identifier:
-                    cluster_name = server_identifier
-
-                if not tariff_group and server_identifier:
-                    tg_stmt = (
-                        select(Server.tariff_group)
-                        .where(Server.cluster_name == server_identifier)
-                        .limit(1)
-                    )
-                    tariff_group = (await session.execute(tg_stmt)).scalar_one_or_none()
-
-                filters = [Server.enabled.is_(True)]
-                if tariff_group:
-                    filters.append(Server.tariff_group == tariff_group)
-                elif cluster_name:
-                    filters.append(Server.cluster_name == cluster_name)
-                else:
-                    return {"countries": []}
-
-                servers_stmt = select(Server).where(*filters)
-                servers_result = await session.execute(servers_stmt)
-                servers = [srv for srv in servers_result.scalars().all() if (srv.panel_type or '').lower() == '3x-ui']
-
-                if not servers:
-                    return {"countries": []}
-
-                async def build_country_entry(server: Server):
-                    inbound_id = server.inbound_id
-                    if not inbound_id or not server.api_url:
-                        return None
-
-                    login_email = f"{key_name}_{server.server_name.lower()}" if SUPERNODE and server.server_name else key_name
-
-                    try:
-                        xui = await get_xui_instance(server.api_url)
-                        inbound = await xui.inbound.get_by_id(int(inbound_id))
-                        if not inbound:
-                            return None
-
-                        country_name = getattr(inbound, 'remark', None) or server.server_name or 'Server'
-                        host_source = server.subscription_url or server.api_url
-                        host = extract_host(host_source)
-                        port = getattr(inbound, 'port', None)
-                        if not host or not port:
-                            return None
-
-                        link_remark = f"{country_name}-{key_name}"
-                        link = await get_vless_link_for_client(
-                            xui=xui,
-                            inbound_id=int(inbound_id),
-                            email=login_email,
-                            external_host=host,
-                            port=int(port),
-                            remark=link_remark,
-                        )
-                        if not link:
-                            return None
-
-                        return {
-                            "country": str(country_name),
-                            "link": link,
-                            "server_name": server.server_name,
-                        }
-                    except Exception as ex:
-                        logging.warning(
-                            f"[Subscription Page] Failed to build country link for {server.server_name}: {ex}"
-                        )
-                        return None
-
-                tasks = [build_country_entry(server) for server in servers]
-                raw_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                countries = []
-                for item in raw_results:
-                    if isinstance(item, dict):
-                        countries.append({"country": item["country"], "link": item["link"]})
-                    elif isinstance(item, Exception):
-                        logging.warning(f"[Subscription Page] country-links task error: {item}")
-
-                if not countries:
-                    return {"countries": []}
-
-                countries.sort(key=lambda entry: entry["country"] or "")
-                return {"countries": countries}
+            countries = await country_links_cache.get_or_load(
+                key_name, lambda: _build_country_links(key_name)
+            )
+            return {"countries": countries or []}
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"[Subscription Page] country-links error: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+    @app.get(f"{BASE_PATH}api/country-links/stream")
+    async def stream_country_links(request: Request, key_name: str = Query(None)):
+
+        client_ip = get_client_ip(request)
+        if not await check_rate_limit(client_ip):
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please try again in 5 minutes."
+            )
+
+        if not key_name:
+            raise HTTPException(status_code=400, detail="Required key_name parameter")
+
+        headers = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+        found, countries = country_links_cache.get(key_name)
+        if found:
+            return StreamingResponse(_stream_cached_countries(countries), media_type="application/x-ndjson", headers=headers)
 
+        try:
+            servers = await _country_servers(key_name)
         except HTTPException:
             raise
         except Exception as e:
             logging.error(f"[Subscription Page] country-links error: {e}")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+        return StreamingResponse(
+            _stream_country_links(key_name, servers), media_type="application/x-ndjson", headers=headers
+        )
+
     @app.post(f"{BASE_PATH}auth/start")
     async def auth_start():
         return JSONResponse(content={"status": "ok"})
 
     @app.get(f"{BASE_PATH}api/settings")
-    async def get_settings():
-        response = JSONResponse(content={
-                "project_name": PROJECT_NAME,
-                "bot_username": USERNAME_BOT,
-                "support_chat": SUPPORT_CHAT_URL,
-                "webhook_host": BUTTON_DOMAIN,
-                "base_path": BASE_PATH,
-                "color_theme": CURRENT_THEME,
-                "gradient_colors": GRADIENT_THEME_COLORS,
-                "language": {
-                    "default_mode": LANGUAGE_MODE,
-                    "fallback": FALLBACK_LANGUAGE
-                },
-                "apps": APPS_ENABLED,
-                "deeplinks": DEEPLINKS,
-                "app_links": APP_LINKS,
-                "buttons": BUTTONS_ENABLED,
-                "happ_cryptolink": HAPP_CRYPTOLINK,
-                "haptic_enabled": HAPTIC_ENABLED,
-                "vless_selector_enabled": VLESS_SELECTOR_ENABLED,
-                "holidays": {
-                    "enabled": HOLIDAYS_ENABLED,
-                    "user_can_disable": HOLIDAYS_USER_CAN_DISABLE,
-                    "list": HOLIDAYS,
-                    "easter_dates": EASTER_DATES,
-                    "easter_config": EASTER_CONFIG
-                }
-            })
-        # Запрещаем кеширование
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        return response
+    async def get_settings(request: Request, v: str = Query(None)):
+        return current_settings().response(request, v)
 
     @app.get(f"{BASE_PATH}health")
     async def health_check():
@@ -405,26 +650,78 @@ def create_api_routes(app, module_path):
                 db_status = "ok"
         except Exception:
             db_status = "unavailable"
-        return JSONResponse(content={"status": "ok", "database": db_status, "module": "xui_subpage"})
+        return JSONResponse(content={
+            "status": "ok",
+            "database": db_status,
+            "db_pool": module_database.stats(),
+            "module": "xui_subpage",
+            "topology": topology.stats(),
+            "rate_limit": rate_limiter.stats(),
+        })
+
+    def collect_runtime_metrics():
+        limits = rate_limiter.stats()
+        pool = module_database.stats()
+        collected = [
+            ("subpage_rate_limit_tracked_ips", "gauge", "IPs tracked by the rate limiter",
+             [({}, limits["tracked_ips"])]),
+            ("subpage_rate_limit_blocked_ips", "gauge", "IPs blocked right now",
+             [({}, limits["blocked_ips"])]),
+            ("subpage_rate_limit_blocks_total", "counter", "IP blocks since start",
+             [({}, limits["blocked_total"])]),
+        ]
+        for name in ("size", "checkedout", "checkedin", "overflow"):
+            if name in pool:
+                collected.append((f"subpage_db_pool_{name}", "gauge", f"SQLAlchemy pool {name}", [({}, pool[name])]))
+        collected.extend([
+            ("subpage_db_pool_checkouts_total", "counter", "Connections taken from the pool",
+             [({}, pool["checkouts"])]),
+            ("subpage_db_pool_checkout_timeouts_total", "counter", "Pool checkouts that timed out",
+             [({}, pool["checkout_timeouts"])]),
+            ("subpage_db_pool_checkout_wait_max_seconds", "gauge", "Longest wait for a pool connection",
+             [({}, pool["max_wait_ms"] / 1000)]),
+        ])
+        caches = {"key": key_cache, "country_links": country_links_cache, "inbound": inbound_cache}
+        for kind in ("hits", "misses"):
+            collected.append((
+                f"subpage_cache_{kind}_total", "counter", f"Cache {kind} by cache",
+                [({"cache": name}, cache.stats()[kind]) for name, cache in caches.items()],
+            ))
+        return collected
+
+    metrics.registry.add_collector(collect_runtime_metrics)
+
+    @app.get(f"{BASE_PATH}metrics")
+    async def get_metrics(request: Request):
+        if not METRICS_ENABLED:
+            raise HTTPException(status_code=404, detail="Not Found")
+        if METRICS_TOKEN:
+            supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            # Байты, а не str: с не-ASCII символами в заголовке compare_digest падает с TypeError
+            if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+                raise HTTPException(status_code=401, detail="Unauthorized")
+        return Response(
+            content=metrics.registry.render(),
+            media_type=metrics.CONTENT_TYPE,
+            headers={"Cache-Control": "no-store"},
+        )
 
     @app.get(f"{BASE_PATH}api/texts")
-    async def get_texts(language: str = "ru"):
-        texts = get_all_texts(language)
-        return JSONResponse(content={"texts": texts, "language": language})
+    async def get_texts(request: Request, language: str = "ru", v: str = Query(None)):
+        payload = texts_payloads.get(language)
+        return payload.response(request, cache_control=cache_control_for(v, texts_payloads.version))
 
     @app.post(f"{BASE_PATH}api/tv")
     async def send_to_tv(request: Request):
 
         client_ip = get_client_ip(request)
-        if not check_rate_limit(client_ip):
+        if not await check_rate_limit(client_ip):
             raise HTTPException(
                 status_code=429,
                 detail="Too many requests. Please try again in 5 minutes."
             )
 
         try:
-            import httpx
-
             data = await request.json()
             code = data.get("code")
             subscription_data = data.get("data")
@@ -435,32 +732,26 @@ def create_api_routes(app, module_path):
                     status_code=400
                 )
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"https://check.happ.su/sendtv/{code}",
-                    headers={"Content-Type": "application/json"},
-                    json={"data": subscription_data}
-                )
+            response = await tv_client.send(code, subscription_data)
+            response_text = response.text
 
-                response_text = response.text
-
-                if response.status_code == 200:
-                    return JSONResponse(
-                        content={
-                            "success": True,
-                            "message": "Subscription sent successfully",
-                            "response": response_text
-                        }
-                    )
-                else:
-                    return JSONResponse(
-                        content={
-                            "success": False,
-                            "error": f"Happ API error: {response.status_code}",
-                            "response": response_text
-                        },
-                        status_code=response.status_code
-                    )
+            if response.status_code == 200:
+                return JSONResponse(
+                    content={
+                        "success": True,
+                        "message": "Subscription sent successfully",
+                        "response": response_text
+                    }
+                )
+            else:
+                return JSONResponse(
+                    content={
+                        "success": False,
+                        "error": f"Happ API error: {response.status_code}",
+                        "response": response_text
+                    },
+                    status_code=response.status_code
+                )
 
         except Exception as e:
             logging.error(f"[Subscription Page] Error sending to Happ API: {e}")
@@ -470,10 +761,15 @@ def create_api_routes(app, module_path):
             )
 
     @app.get(f"{BASE_PATH}api/qr")
-    async def get_qr_code(request: Request, key_name: str = Query(None)):
+    async def get_qr_code(
+        request: Request,
+        key_name: str = Query(None),
+        format: str = Query("png"),
+        size: int = Query(QR_DEFAULT_SIZE),
+    ):
 
         client_ip = get_client_ip(request)
-        if not check_rate_limit(client_ip):
+        if not await check_rate_limit(client_ip):
             raise HTTPException(
                 status_code=429,
                 detail="Too many requests. Please try again in 5 minutes."
@@ -482,45 +778,35 @@ def create_api_routes(app, module_path):
         if not key_name:
             raise HTTPException(status_code=400, detail="Required key_name parameter")
 
-        try:
-            import qrcode
-            from io import BytesIO
-
-            session_maker = get_module_session_maker()
-            async with session_maker() as session:
-                query = select(Key).where(
-                    Key.email == key_name,
-                    Key.is_frozen == False
-                ).limit(1)
-
-                result = await session.execute(query)
-                row = result.scalar_one_or_none()
+        fmt = (format or "png").lower()
+        if fmt not in QR_FORMATS:
+            raise HTTPException(status_code=400, detail="Unsupported format, use png or svg")
+        box_size = min(max(size, QR_MIN_SIZE), QR_MAX_SIZE)
 
-                if not row:
-                    raise HTTPException(status_code=404, detail="Subscription not found")
-
-                remnawave_link = getattr(row, "remnawave_link", None)
+        try:
+            snapshot = await get_key_snapshot(key_name)
 
-                if HAPP_CRYPTOLINK and remnawave_link:
-                    qr_data = remnawave_link
-                else:
-                    qr_data = row.key or remnawave_link
+            if not snapshot:
+                raise HTTPException(status_code=404, detail="Subscription not found")
 
-                if not qr_data:
-                    raise HTTPException(status_code=404, detail="No subscription link available")
+            remnawave_link = snapshot["remnawave_link"]
 
-                logging.info(f"[Subscription Page] Generating QR for key: {key_name}, data length: {len(qr_data)}")
+            if HAPP_CRYPTOLINK and remnawave_link:
+                qr_data = remnawave_link
+            else:
+                qr_data = snapshot["key"] or remnawave_link
 
-                qr = qrcode.QRCode(version=1, box_size=10, border=1)
-                qr.add_data(qr_data)
-                qr.make(fit=True)
+            if not qr_data:
+                raise HTTPException(status_code=404, detail="No subscription link available")
 
-                img = qr.make_image(fill_color="black", back_color="white")
-                buffer = BytesIO()
-                img.save(buffer, format="PNG")
-                buffer.seek(0)
+            cache_control = "private, no-cache"
+            etag = qr_renderer.etag_for(qr_data, fmt, box_size)
+            if etag_matches(request, etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
 
-                return StreamingResponse(buffer, media_type="image/png")
+            with tracing.span("qr_render"):
+                payload = await qr_renderer.get(qr_data, fmt, box_size)
+            return payload.response(request, cache_control=cache_control)
 
         except HTTPException:
             raise
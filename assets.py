@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+
+# Порядок важен: файлы зависят от глобальных объектов, объявленных в предыдущих.
+# auth.js не входит в бандл, он подключается отдельно в <head> до отрисовки страницы
+JS_FILES = (
+    "js/core/image-loader.js",
+    "js/core/loader.js",
+    "js/core/constants.js",
+    "js/core/api.js",
+    "js/core/telegram.js",
+    "js/features/themes.js",
+    "js/features/language.js",
+    "js/features/platform.js",
+    "js/features/subscription.js",
+    "js/features/notifications.js",
+    "js/features/haptic.js",
+    "js/features/marquee.js",
+    "js/features/holiday-detect.js",
+    "js/ui/platform-selector.js",
+    "js/ui/app-selector.js",
+    "js/ui/installation-steps.js",
+    "js/ui/clipboard.js",
+    "js/ui/qr-toggle.js",
+    "js/main.js",
+)
+
+# Части страницы, которые загружаются по требованию (см. js/core/loader.js).
+# Стили для них остаются в общем app.css, это всего несколько килобайт
+LAZY_JS_FILES = {
+    "qr-scanner": ("js/features/qr-scanner.js",),
+    "holidays": ("js/features/holidays.js",),
+    "share": ("js/ui/share.js",),
+    "vless-selector": ("js/ui/vless-selector.js",),
+}
+
+CSS_FILES = (
+    "css/base/themes.css",
+    "css/components/platform-selector.css",
+    "css/components/share-menu.css",
+    "css/components/vless-selector.css",
+    "css/components/app-selector.css",
+    "css/components/installation-steps.css",
+    "css/components/qr-scanner.css",
+    "css/components/holidays.css",
+    "css/styles.css",
+)
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+MEDIA_TYPES = {
+    ".js": "application/javascript",
+    ".css": "text/css",
+}
+
+CSS_TOKEN_RE = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.S)
+CSS_SPACE_RE = re.compile(r"\s+")
+CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+def _count_backticks(line):
+    count = 0
+    escaped = False
+    for char in line:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "`":
+            count += 1
+    return count
+
+
+# Построчная минификация без разбора JS: убираются отступы, пустые строки и
+# комментарии на отдельных строках. Переводы строк сохраняются, поэтому
+# автоматическая расстановка точек с запятой работает как в исходниках.
+# Строки внутри многострочных шаблонных литералов остаются без изменений
+def minify_js(source: str) -> str:
+    lines = []
+    in_template = False
+    in_comment = False
+
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+            if _count_backticks(line) % 2:
+                in_template = False
+            continue
+
+        stripped = line.strip()
+        if in_comment:
+            if "*/" in stripped:
+                in_comment = False
+                stripped = stripped.split("*/", 1)[1].strip()
+            else:
+                continue
+        elif stripped.startswith("/*"):
+            if "*/" not in stripped:
+                in_comment = True
+                continue
+            stripped = stripped.split("*/", 1)[1].strip()
+
+        if not stripped or stripped.startswith("//"):
+            continue
+
+        lines.append(stripped)
+        if _count_backticks(stripped) % 2:
+            in_template = True
+
+    return "\n".join(lines)
+
+
+def minify_css(source: str) -> str:
+    parts = []
+    position = 0
+    for match in CSS_TOKEN_RE.finditer(source):
+        parts.append(_minify_css_chunk(source[position:match.start()]))
+        # Строки сохраняются как есть, комментарии выбрасываются
+        if match.group(1):
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(_minify_css_chunk(source[position:]))
+    return "".join(parts).replace(";}", "}").strip()
+
+
+def _minify_css_chunk(chunk):
+    # Пробелы вокруг ":" не трогаем: в селекторах (a :hover) они значимы
+    chunk = CSS_SPACE_RE.sub(" ", chunk)
+    return CSS_PUNCT_RE.sub(r"\1", chunk)
+
+
+def _read(static_path, relative_path):
+    with open(os.path.join(static_path, relative_path), encoding="utf-8") as f:
+        return f.read()
+
+
+def _content_name(name, extension, body: bytes):
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return f"{name}.{digest}{extension}"
+
+
+# Собирает бандлы в памяти. Возвращает (манифест, {имя файла: содержимое})
+def build_bundles(static_path, minify=True):
+    def join_js(paths):
+        return ";\n".join((minify_js if minify else str)(_read(static_path, path)) for path in paths) + "\n"
+
+    bundles = [("app", ".js", join_js(JS_FILES))]
+    bundles.extend((name, ".js", join_js(paths)) for name, paths in LAZY_JS_FILES.items())
+    bundles.append((
+        "app", ".css",
+        "\n".join((minify_css if minify else str)(_read(static_path, path)) for path in CSS_FILES) + "\n",
+    ))
+
+    manifest = {}
+    files = {}
+    for name, extension, content in bundles:
+        body = content.encode("utf-8")
+        filename = _content_name(name, extension, body)
+        manifest[name + extension] = f"{DIST_DIR}/{filename}"
+        files[filename] = body
+    return manifest, files
+
+
+def write_bundles(static_path, minify=True):
+    manifest, files = build_bundles(static_path, minify)
+    dist_path = os.path.join(static_path, DIST_DIR)
+    os.makedirs(dist_path, exist_ok=True)
+    for filename, body in files.items():
+        with open(os.path.join(dist_path, filename), "wb") as f:
+            f.write(body)
+    with open(os.path.join(dist_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest, files
+
+
+def media_type_for(filename):
+    return MEDIA_TYPES.get(os.path.splitext(filename)[1], "application/octet-stream")
+
+
+def style_tags(base_path, version, manifest=None):
+    if manifest:
+        return f'<link rel="stylesheet" href="{base_path}static/{manifest["app.css"]}">'
+    return "\n    ".join(
+        f'<link rel="stylesheet" href="{base_path}static/{path}?v={version}">' for path in CSS_FILES
+    )
+
+
+def script_tags(base_path, version, manifest=None):
+    if manifest:
+        return f'<script src="{base_path}static/{manifest["app.js"]}"></script>'
+    return "\n    ".join(
+        f'<script src="{base_path}static/{path}?v={version}"></script>' for path in JS_FILES
+    )
+
+
+# Скрипты частей, загружаемых по требованию: имя -> список URL в порядке загрузки
+def feature_scripts(base_path, version, manifest=None):
+    if manifest:
+        return {name: [f"{base_path}static/{manifest[name + '.js']}"] for name in LAZY_JS_FILES}
+    return {
+        name: [f"{base_path}static/{path}?v={version}" for path in paths]
+        for name, paths in LAZY_JS_FILES.items()
+    }
+
+
+# Сборка на диск без запуска бота:
+#   python modules/xui_subpage/assets.py
+# Бандлы появятся в static/dist вместе с manifest.json
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    built_manifest, built_files = write_bundles(target)
+    for built_name, built_body in built_files.items():
+        logging.info(f"[Subscription Page] {DIST_DIR}/{built_name}: {len(built_body)} bytes")
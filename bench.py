@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import importlib.machinery
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+# Замер задержки хуков бота (telegram.py) без бота и базы:
+#   python modules/xui_subpage/bench.py
+#   python modules/xui_subpage/bench.py --keys 1,10,100 --modes webapp,web_extra --save bench_baseline.json
+#   python modules/xui_subpage/bench.py --compare bench_baseline.json
+# database, config и modules.one_subs подменяются заглушками в памяти, настоящий код
+# модуля (telegram.py, settings.py, cache.py) загружается без __init__.py, то есть без
+# запуска веб-сервера и регистрации хуков. Нужны только aiogram и sqlalchemy
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_NAME = "xui_subpage_bench"
+BUTTON_MODES = ("webapp", "web", "webapp_extra", "web_extra")
+DEFAULT_BASELINE = os.path.join(MODULE_DIR, "bench_baseline.json")
+
+
+class StandInKey:
+    __slots__ = ("email", "key", "remnawave_link", "tg_id", "server_id")
+
+    def __init__(self, index, chat_id, all_vless=False):
+        self.email = f"user{chat_id}_{index}"
+        # Каждый четвёртый ключ не VLESS: классификация останавливается на втором таком ключе (индекс 4).
+        # all_vless = худший случай, когда проверяется весь список
+        if all_vless or index % 4:
+            self.key = f"vless://{index}@example.com:443"
+        else:
+            self.key = f"https://sub.example.com/{index}"
+        self.remnawave_link = None
+        self.tg_id = chat_id
+        self.server_id = "cluster-1"
+
+
+class StandInResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class StandInBatchKey:
+    __slots__ = ("email", "key", "remnawave_link")
+
+    def __init__(self, email):
+        self.email = email
+        self.key = f"vless://{email}@example.com:443"
+        self.remnawave_link = None
+
+
+# Сессия-заглушка: отвечает только на запрос, который строит zero_traffic_notification_batch_hook
+class StandInSession:
+    def __init__(self, latency):
+        self.latency = latency
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        # Значения из Key.email.in_(...) без компиляции запроса, чтобы не замерять саму заглушку
+        emails = statement.whereclause.right.value
+        return StandInResult([StandInBatchKey(email) for email in emails])
+
+
+def _install_stand_ins(key_count, latency):
+    from sqlalchemy import String
+    from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+    class Base(DeclarativeBase):
+        pass
+
+    class Key(Base):
+        __tablename__ = "keys"
+        email: Mapped[str] = mapped_column(String, primary_key=True)
+        key: Mapped[str] = mapped_column(String, nullable=True)
+        remnawave_link: Mapped[str] = mapped_column(String, nullable=True)
+
+    async def db_call(result):
+        if latency:
+            await asyncio.sleep(latency)
+        return result
+
+    database = types.ModuleType("database")
+    database.keys_per_user = key_count
+    database.all_vless = False
+
+    async def get_keys(session, chat_id):
+        return await db_call([
+            StandInKey(index, chat_id, database.all_vless) for index in range(database.keys_per_user)
+        ])
+
+    async def get_key_count(session, chat_id):
+        return await db_call(database.keys_per_user)
+
+    async def get_key_details(session, email):
+        return await db_call({"key": f"vless://{email}@example.com:443", "remnawave_link": None, "link": None})
+
+    database.get_keys = get_keys
+    database.get_key_count = get_key_count
+    database.get_key_details = get_key_details
+    models = types.ModuleType("database.models")
+    models.Key = Key
+    database.models = models
+
+    config = types.ModuleType("config")
+    config.WEBHOOK_HOST = "https://bot.example.com"
+
+    async def is_vless_key(session, key):
+        link = key.key or key.remnawave_link or ""
+        return link.startswith("vless://")
+
+    modules = sys.modules.get("modules") or types.ModuleType("modules")
+    modules.__path__ = getattr(modules, "__path__", [])
+    one_subs = types.ModuleType("modules.one_subs")
+    one_subs.__path__ = []
+    one_subs_router = types.ModuleType("modules.one_subs.router")
+    one_subs_router.is_vless_key = is_vless_key
+    one_subs.router = one_subs_router
+
+    sys.modules.update({
+        "database": database,
+        "database.models": models,
+        "config": config,
+        "modules": modules,
+        "modules.one_subs": one_subs,
+        "modules.one_subs.router": one_subs_router,
+    })
+    return database
+
+
+def _load_telegram():
+    # Пакет модуля без __init__.py: router.py запускает сервер и регистрирует хуки
+    spec = importlib.machinery.ModuleSpec(PACKAGE_NAME, None, is_package=True)
+    package = importlib.util.module_from_spec(spec)
+    package.__path__ = [MODULE_DIR]
+    sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.telegram")
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _measure(call, iterations, warmup):
+    for _ in range(warmup):
+        await call()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter_ns()
+        await call()
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+
+    # Память считается отдельным проходом: tracemalloc сильно замедляет вызовы
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for _ in range(min(iterations, 200)):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await call()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_us": round(_percentile(timings, 0.50) / 1000, 2),
+        "p99_us": round(_percentile(timings, 0.99) / 1000, 2),
+        "alloc_bytes": allocated // min(iterations, 200),
+    }
+
+
+def _scenarios(telegram, database, session, key_count):
+    chat_id = 1000
+    email = f"user{chat_id}_0"
+    emails = [f"user{index}_0" for index in range(key_count)]
+    sample_key = StandInKey(1, chat_id)
+
+    async def profile_menu():
+        await telegram.profile_menu_hook(chat_id=chat_id, admin=False, session=session)
+
+    async def profile_menu_all_vless():
+        database.all_vless = True
+        try:
+            await telegram.profile_menu_hook(chat_id=chat_id, admin=False, session=session)
+        finally:
+            database.all_vless = False
+
+    async def view_key_menu():
+        await telegram.view_key_menu_hook(key_name=email, session=session)
+
+    async def key_creation_complete():
+        await telegram.key_creation_complete_hook(key_name=email, session=session)
+
+    async def zero_traffic_notification():
+        await telegram.zero_traffic_notification_hook(email=email, session=session)
+
+    async def zero_traffic_notification_batch():
+        await telegram.zero_traffic_notification_batch_hook(emails=emails, session=session)
+        # Кнопки для рассылки запоминаются, для честного замера одиночного хука их убираем
+        telegram._prefetched_buttons.clear()
+
+    async def xui_subpage_buttons():
+        telegram.create_xui_subpage_buttons(sample_key)
+
+    return {
+        "profile_menu_hook": profile_menu,
+        "profile_menu_hook_all_vless": profile_menu_all_vless,
+        "view_key_menu_hook": view_key_menu,
+        "key_creation_complete_hook": key_creation_complete,
+        "zero_traffic_notification_hook": zero_traffic_notification,
+        "zero_traffic_notification_batch_hook": zero_traffic_notification_batch,
+        "create_xui_subpage_buttons": xui_subpage_buttons,
+    }
+
+
+async def run(key_counts, modes, iterations, warmup, latency):
+    database = _install_stand_ins(key_counts[0], latency)
+    telegram = _load_telegram()
+
+    # one_subs включён, иначе profile_menu_hook завершается до похода в базу
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as settings_file:
+        settings_file.write("ENABLED = True\n")
+    telegram.ONE_SUBS_SETTINGS_PATH = settings_file.name
+
+    results = {}
+    try:
+        for mode in modes:
+            telegram.BUTTON_MODE = mode
+            for key_count in key_counts:
+                database.keys_per_user = key_count
+                session = StandInSession(latency)
+                for hook, call in _scenarios(telegram, database, session, key_count).items():
+                    results[f"{hook}[mode={mode},keys={key_count}]"] = await _measure(call, iterations, warmup)
+    finally:
+        os.unlink(settings_file.name)
+    return results
+
+
+def _print_results(results, baseline=None):
+    width = max(len(name) for name in results)
+    header = f"{'hook':<{width}}  {'p50 us':>10}  {'p99 us':>10}  {'alloc B':>9}"
+    if baseline:
+        header += f"  {'p50 vs base':>11}  {'p99 vs base':>11}"
+    print(header)
+    for name, stats in results.items():
+        line = f"{name:<{width}}  {stats['p50_us']:>10.2f}  {stats['p99_us']:>10.2f}  {stats['alloc_bytes']:>9}"
+        base = (baseline or {}).get(name)
+        if base:
+            line += f"  {_delta(stats['p50_us'], base['p50_us']):>11}  {_delta(stats['p99_us'], base['p99_us']):>11}"
+        print(line)
+
+
+def _delta(value, base):
+    if not base:
+        return "n/a"
+    return f"{(value - base) / base * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the subscription page Telegram hooks")
+    parser.add_argument("--keys", default="1,10,100", help="keys per user (and batch size), comma separated")
+    parser.add_argument("--modes", default=",".join(BUTTON_MODES), help="BUTTON_MODE values, comma separated")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated latency of every DB call")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="write results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="compare with a saved baseline")
+    args = parser.parse_args()
+
+    key_counts = [int(value) for value in args.keys.split(",") if value]
+    modes = [value for value in args.modes.split(",") if value]
+    for mode in modes:
+        if mode not in BUTTON_MODES:
+            parser.error(f"unknown BUTTON_MODE {mode!r}")
+
+    results = asyncio.run(run(key_counts, modes, args.iterations, args.warmup, args.db_latency_ms / 1000))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    _print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "iterations": args.iterations,
+                "db_latency_ms": args.db_latency_ms,
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
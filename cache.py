@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from .settings import (
+    KEY_CACHE_MAX_SIZE, KEY_CACHE_TTL, KEY_CACHE_NEGATIVE_TTL,
+    COUNTRY_LINKS_CACHE_TTL, INBOUND_CACHE_TTL
+)
+
+
+# Ограниченный LRU-кеш с TTL. None кешируется как отрицательный результат
+# (например, «ключ не найден») со своим, обычно более коротким, TTL.
+# В режиме "thread" invalidate() вызывается из потока бота, пока поток веб-сервера
+# читает кеш, поэтому изменения словарей выполняются под блокировкой
+class TTLCache:
+    def __init__(self, maxsize, ttl, negative_ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            # Загрузка, начатая до инвалидации, не должна записать устаревшее значение
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._inflight.clear()
+
+    async def get_or_load(self, key, loader):
+        found, value = self.get(key)
+        if found:
+            return value
+
+        # Параллельные запросы одного ключа ждут одну и ту же загрузку
+        task, _ = self.load(key, loader)
+        return await asyncio.shield(task)
+
+    # Уже идущая загрузка ключа или новая. Возвращает (задача, запущена ли она этим вызовом)
+    def load(self, key, loader):
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is not None:
+                return task, False
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            return task, True
+
+    async def _load(self, key, loader):
+        current = asyncio.current_task()
+        try:
+            value = await loader()
+            with self._lock:
+                if self._inflight.get(key) is current:
+                    self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is current:
+                    del self._inflight[key]
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "max_size": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight": len(self._inflight),
+        }
+
+
+key_cache = TTLCache(KEY_CACHE_MAX_SIZE, KEY_CACHE_TTL, KEY_CACHE_NEGATIVE_TTL)
+
+# Пустой список стран кешируется коротко: панели могли быть временно недоступны
+country_links_cache = TTLCache(KEY_CACHE_MAX_SIZE, COUNTRY_LINKS_CACHE_TTL, KEY_CACHE_NEGATIVE_TTL)
+
+# remark/port inbound'а по (api_url, inbound_id), общие для всех ключей
+inbound_cache = TTLCache(1024, INBOUND_CACHE_TTL, KEY_CACHE_NEGATIVE_TTL)
+
+
+def invalidate_key(key_name):
+    if key_name:
+        key_cache.invalidate(key_name)
+        country_links_cache.invalidate(key_name)
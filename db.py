@@ -0,0 +1,124 @@
+import logging
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config import DATABASE_URL
+
+from .settings import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT,
+)
+
+
+# Счётчики выдачи соединений из пула страницы
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.slow_checkouts = 0
+
+    def record(self, elapsed, timed_out=False):
+        self.checkouts += 1
+        self.wait_total += elapsed
+        if elapsed > self.wait_max:
+            self.wait_max = elapsed
+        # Соединения не хватило сразу: пул исчерпан или открывалось новое подключение
+        if elapsed > 0.05:
+            self.slow_checkouts += 1
+        if timed_out:
+            self.timeouts += 1
+
+    def stats(self):
+        return {
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.timeouts,
+            "slow_checkouts": self.slow_checkouts,
+            "avg_wait_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 2),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+# Пул, который замеряет, сколько запрос ждал свободное соединение
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+
+def _connect_args(url):
+    if not DB_STATEMENT_TIMEOUT:
+        return {}
+    timeout_ms = str(int(DB_STATEMENT_TIMEOUT * 1000))
+    if "+asyncpg" in url:
+        return {"server_settings": {"statement_timeout": timeout_ms}}
+    if "+psycopg" in url:
+        return {"options": f"-c statement_timeout={timeout_ms}"}
+    logging.warning(
+        "[Subscription Page] DB_STATEMENT_TIMEOUT is supported only for PostgreSQL (asyncpg/psycopg), ignored"
+    )
+    return {}
+
+
+# Свой движок страницы. Движок бота использовать нельзя: в режиме "thread" страница работает
+# в отдельном потоке со своим циклом событий, а соединения AsyncEngine привязаны к циклу,
+# в котором открыты. Поэтому движок создаётся и живёт в цикле веб-сервера
+class ModuleDatabase:
+    def __init__(self):
+        self.engine = None
+        self.session_maker = None
+
+    def get_session_maker(self):
+        if self.session_maker is None:
+            self.engine = create_async_engine(
+                DATABASE_URL,
+                echo=False,
+                future=True,
+                poolclass=MonitoredQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING,
+                connect_args=_connect_args(DATABASE_URL),
+            )
+            self.session_maker = async_sessionmaker(
+                bind=self.engine,
+                expire_on_commit=False,
+                class_=AsyncSession
+            )
+        return self.session_maker
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+        self.engine = None
+        self.session_maker = None
+
+    def stats(self):
+        result = {}
+        if self.engine is not None:
+            pool = self.engine.pool
+            result.update(
+                size=pool.size(),
+                checkedout=pool.checkedout(),
+                checkedin=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        result.update(pool_metrics.stats())
+        return result
+
+
+module_database = ModuleDatabase()
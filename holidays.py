@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from .settings import HOLIDAYS_ENABLED, HOLIDAYS, EASTER_DATES, EASTER_CONFIG
+
+HOLIDAY_FIELDS = ("theme", "emoji", "greeting", "effects")
+
+
+def _describe(key, holiday):
+    active = {"key": key}
+    for field in HOLIDAY_FIELDS:
+        active[field] = holiday.get(field)
+    if active["effects"] is None:
+        active["effects"] = []
+    return active
+
+
+def _in_range(today: date, holiday) -> bool:
+    # Сравнение без года, как ММДД
+    current = today.month * 100 + today.day
+    start = holiday["start_month"] * 100 + holiday["start_day"]
+    end = holiday["end_month"] * 100 + holiday["end_day"]
+    if start <= end:
+        return start <= current <= end
+    # Переход через новый год (например, 25 декабря - 10 января)
+    return current >= start or current <= end
+
+
+def _easter(today: date):
+    if not EASTER_CONFIG or EASTER_CONFIG.get("enabled") is False:
+        return None
+    easter = EASTER_DATES.get(today.year)
+    if not easter:
+        return None
+    easter_day = date(today.year, easter[0], easter[1])
+    if (easter_day - timedelta(days=EASTER_CONFIG.get("days_before", 0))
+            <= today
+            <= easter_day + timedelta(days=EASTER_CONFIG.get("days_after", 0))):
+        return _describe("easter", EASTER_CONFIG)
+    return None
+
+
+# Праздник, который идёт в указанный день: Пасха важнее обычных праздников,
+# среди обычных побеждает первый в HOLIDAYS
+def resolve_active_holiday(today: date = None):
+    if not HOLIDAYS_ENABLED:
+        return None
+    today = today or date.today()
+
+    easter = _easter(today)
+    if easter:
+        return easter
+
+    for key, holiday in HOLIDAYS.items():
+        if holiday.get("enabled") is False:
+            continue
+        if _in_range(today, holiday):
+            return _describe(key, holiday)
+    return None
@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Меньше этого размера сжатие не окупается
+MIN_COMPRESS_SIZE = 512
+
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+def make_etag(body: bytes, suffix: str = "") -> str:
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'"{digest}{suffix}"'
+
+
+def variant_etag(etag: str, encoding) -> str:
+    if not encoding:
+        return etag
+    return etag[:-1] + f'-{encoding}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    tags = parse_if_none_match(request.headers.get("if-none-match"))
+    if not tags:
+        return False
+    if "*" in tags:
+        return True
+    return any(variant_etag(etag, encoding) in tags for encoding in (None, *ENCODING_PREFERENCE))
+
+
+def parse_if_none_match(header):
+    if not header:
+        return set()
+    tags = set()
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate:
+            tags.add(candidate)
+    return tags
+
+
+def select_encoding(accept_encoding, available):
+    if not accept_encoding or not available:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip()] = quality
+
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress_variants(body: bytes):
+    variants = {}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+    variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return variants
+
+
+# Сжатие на лету для ответов, которые собираются на каждый запрос
+def compressed_response(request: Request, body: bytes, media_type: str, headers=None) -> Response:
+    response_headers = {"Vary": "Accept-Encoding"}
+    if headers:
+        response_headers.update(headers)
+
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    encoding = None
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoding = select_encoding(request.headers.get("accept-encoding"), available)
+
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=5)
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=response_headers)
+
+
+class PrecompressedPayload:
+    __slots__ = ("body", "media_type", "variants", "etag", "etags")
+
+    def __init__(self, body: bytes, media_type: str, compress: bool = True, etag: str = None):
+        self.body = body
+        self.media_type = media_type
+        self.variants = compress_variants(body) if compress else {}
+        self.etag = etag or make_etag(body)
+        # У каждого представления свой сильный ETag, база общая
+        self.etags = {None: self.etag}
+        for encoding in self.variants:
+            self.etags[encoding] = variant_etag(self.etag, encoding)
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+    def not_modified(self, request: Request) -> bool:
+        return etag_matches(request, self.etag)
+
+    def response(self, request: Request, cache_control: str = "no-cache", headers=None) -> Response:
+        encoding = select_encoding(request.headers.get("accept-encoding"), self.variants)
+        response_headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if headers:
+            response_headers.update(headers)
+
+        if self.not_modified(request):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+            return Response(content=self.variants[encoding], media_type=self.media_type, headers=response_headers)
+        return Response(content=self.body, media_type=self.media_type, headers=response_headers)
@@ -0,0 +1,97 @@
+import logging
+import os
+import re
+import time
+
+from .http_cache import PrecompressedPayload
+
+PLACEHOLDER_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+
+# Место в шаблоне, куда при запросе с key_name встраиваются данные подписки
+INLINE_PLACEHOLDER = "BOOTSTRAP_JSON"
+INLINE_MARKER = "\x00xui-subpage-inline\x00"
+
+
+def read_version(version_path, default="1.0.0"):
+    try:
+        with open(version_path, encoding="utf-8") as f:
+            return f.read().strip() or default
+    except OSError:
+        return default
+
+
+def render_template(template: str, context: dict) -> str:
+    return PLACEHOLDER_RE.sub(lambda m: context.get(m.group(1), m.group(0)), template)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# Готовый index.html в памяти: перерисовывается только при изменении файлов
+class IndexPage:
+    def __init__(self, html_path, version_path, context, reload_interval=2.0):
+        self.html_path = html_path
+        self.version_path = version_path
+        self.context = dict(context)
+        self.reload_interval = reload_interval
+        self.version = "1.0.0"
+        self.payload = None
+        self.inline_parts = None
+        self._stamp = None
+        self._next_check = 0.0
+
+    def _current_stamp(self):
+        return _mtime(self.html_path), _mtime(self.version_path)
+
+    def render(self):
+        stamp = self._current_stamp()
+        self.version = read_version(self.version_path)
+
+        if stamp[0] is None:
+            self.payload = None
+            self.inline_parts = None
+            self._stamp = stamp
+            return None
+
+        try:
+            with open(self.html_path, encoding="utf-8") as f:
+                template = f.read()
+        except OSError as e:
+            logging.error(f"[Subscription Page] Failed to read index.html: {e}")
+            return self.payload
+
+        content = render_template(
+            template, {**self.context, "VERSION": self.version, INLINE_PLACEHOLDER: INLINE_MARKER}
+        )
+        head, marker, tail = content.encode("utf-8").partition(INLINE_MARKER.encode("utf-8"))
+        self.inline_parts = (head, tail) if marker else None
+        self.payload = PrecompressedPayload(head + (b"null" if marker else b"") + tail, "text/html")
+        self._stamp = stamp
+        logging.info(f"[Subscription Page] index.html rendered, version {self.version}, etag {self.payload.etag}")
+        return self.payload
+
+    def update_context(self, values):
+        if all(self.context.get(name) == value for name, value in values.items()):
+            return self.payload
+        self.context.update(values)
+        return self.render()
+
+    def render_inline(self, inline: bytes):
+        # Шаблон уже собран, остаётся только вставить данные между готовыми частями
+        if self.inline_parts is None:
+            return None
+        head, tail = self.inline_parts
+        return head + inline + tail
+
+    def get(self):
+        # Проверяем mtime не чаще reload_interval, в остальное время диск не трогаем
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.reload_interval
+            if self._stamp is None or self._current_stamp() != self._stamp:
+                self.render()
+        return self.payload
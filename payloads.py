@@ -0,0 +1,74 @@
+import hashlib
+import json
+
+from .http_cache import PrecompressedPayload
+
+# Для запросов с ?v=<текущая версия>: URL меняется вместе с содержимым, поэтому кешировать можно надолго
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+def dump_json(content) -> bytes:
+    # Та же сериализация, что у JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def versioned_etag(version, name, body: bytes) -> str:
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return f'"{name}-{version}-{digest}"'
+
+
+def inline_json(body: bytes) -> str:
+    # Безопасно для вставки внутрь <script>: никаких "</script>" и "<!--"
+    return (
+        body.decode("utf-8")
+        .replace("<", "\\u003c")
+        .replace("\u2028", "\\u2028")
+        .replace("\u2029", "\\u2029")
+    )
+
+
+def cache_control_for(requested_version, version):
+    if requested_version and requested_version == version:
+        return IMMUTABLE_CACHE
+    return REVALIDATE_CACHE
+
+
+# Неизменяемый JSON-ответ с версией по хешу содержимого
+class JsonSnapshot:
+    def __init__(self, name, content):
+        body = dump_json(content)
+        self.version = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.payload = PrecompressedPayload(body, "application/json", etag=f'"{name}-{self.version}"')
+        self.inline = inline_json(body)
+
+    def response(self, request, requested_version=None):
+        return self.payload.response(request, cache_control=cache_control_for(requested_version, self.version))
+
+
+# Готовые ответы /api/texts для каждого языка: тексты меняются только при перезапуске.
+# Рядом хранится тот же JSON, уже экранированный для вставки в страницу (INLINE_INITIAL_DATA)
+class TextsPayloads:
+    def __init__(self, version, build_texts, languages, fallback="ru"):
+        self.version = version
+        self._build_texts = build_texts
+        self._payloads = {language: self._make(language) for language in languages}
+        # Неизвестный язык получает готовые тексты языка по умолчанию (как get_all_texts):
+        # ни сжатия на каждый запрос, ни значения из запроса в ETag
+        self._fallback = self._payloads.get(fallback) or self._make(fallback)
+        self._inline = {
+            language: inline_json(payload.body).encode("utf-8") for language, payload in self._payloads.items()
+        }
+        self._fallback_inline = inline_json(self._fallback.body).encode("utf-8")
+
+    def _make(self, language):
+        body = dump_json({"texts": self._build_texts(language), "language": language})
+        return PrecompressedPayload(
+            body, "application/json", etag=versioned_etag(self.version, f"texts-{language}", body)
+        )
+
+    def get(self, language):
+        return self._payloads.get(language, self._fallback)
+
+    def inline(self, language) -> bytes:
+        return self._inline.get(language, self._fallback_inline)
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from .http_cache import PrecompressedPayload
+from .settings import QR_CACHE_MAX_BYTES, QR_RENDER_THREADS
+
+QR_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+QR_DEFAULT_SIZE = 10
+QR_MIN_SIZE = 2
+QR_MAX_SIZE = 20
+
+
+def render_qr(data: str, fmt: str, box_size: int) -> bytes:
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=1)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    if fmt == "svg":
+        import qrcode.image.svg
+
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# Готовые QR-коды по хешу содержимого. Вытеснение LRU по суммарному размеру в байтах,
+# рендер в отдельном пуле потоков, чтобы кодирование PNG не блокировало event loop
+class QRRenderer:
+    def __init__(self, max_bytes, threads):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.renders = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="xui-subpage-qr")
+
+    @staticmethod
+    def cache_key(data, fmt, box_size):
+        digest = hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{digest}:{fmt}:{box_size}"
+
+    @staticmethod
+    def etag_for(data, fmt, box_size):
+        # ETag зависит только от содержимого и параметров, поэтому 304 отдаётся без рендера
+        digest = hashlib.blake2b(f"{data}\0{fmt}\0{box_size}".encode("utf-8"), digest_size=16).hexdigest()
+        return f'"qr-{digest}"'
+
+    def _store(self, key, payload):
+        size = payload.size
+        if size > self.max_bytes:
+            return
+        self._entries[key] = payload
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    async def _render(self, key, data, fmt, box_size):
+        try:
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(self._executor, render_qr, data, fmt, box_size)
+            # PNG уже сжат, а SVG хорошо жмётся gzip/brotli
+            payload = PrecompressedPayload(
+                body, QR_FORMATS[fmt], compress=(fmt == "svg"), etag=self.etag_for(data, fmt, box_size)
+            )
+            self._store(key, payload)
+            self.renders += 1
+            logging.info(f"[Subscription Page] QR rendered: {fmt}, size {box_size}, data length {len(data)}")
+            return payload
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, data, fmt="png", box_size=QR_DEFAULT_SIZE):
+        key = self.cache_key(data, fmt, box_size)
+
+        payload = self._entries.get(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(key, data, fmt, box_size))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "renders": self.renders,
+        }
+
+
+qr_renderer = QRRenderer(QR_CACHE_MAX_BYTES, QR_RENDER_THREADS)
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+# Поля записи об IP
+WINDOW_START, CURRENT, PREVIOUS, BLOCKED_UNTIL, LAST_SEEN = range(5)
+
+
+# Скользящее окно на двух счётчиках (текущее и предыдущее окно): память на IP
+# постоянная, проверка за O(1). Возвращает (разрешено, заблокирован сейчас)
+def apply_hit(entry, now, limit, period, block_time):
+    entry[LAST_SEEN] = now
+
+    if entry[BLOCKED_UNTIL] > now:
+        return False, False
+
+    elapsed = now - entry[WINDOW_START]
+    if elapsed >= period:
+        windows = int(elapsed // period)
+        entry[PREVIOUS] = entry[CURRENT] if windows == 1 else 0
+        entry[CURRENT] = 0
+        entry[WINDOW_START] += windows * period
+        elapsed = now - entry[WINDOW_START]
+
+    estimated = entry[PREVIOUS] * (1 - elapsed / period) + entry[CURRENT]
+    if estimated >= limit:
+        entry[BLOCKED_UNTIL] = now + block_time
+        return False, True
+
+    entry[CURRENT] += 1
+    return True, False
+
+
+# Общий интерфейс хранилищ лимитов: allow() вызывается на каждый запрос, stats() для мониторинга.
+# stats() отдаёт готовые счётчики: /health открыт всем и не должен перебирать все записи
+class RateLimitStore(ABC):
+    def __init__(self, limit, period, block_time, max_tracked):
+        self.limit = limit
+        self.period = period
+        self.block_time = block_time
+        self.max_tracked = max(1, max_tracked)
+        self.idle_ttl = max(period * 2, block_time)
+        self.blocked_total = 0
+        self.evicted_total = 0
+
+    def _on_blocked(self, ip):
+        self.blocked_total += 1
+        logging.warning(f"[Subscription Page] IP {ip} blocked for {self.block_time}s")
+
+    @abstractmethod
+    async def allow(self, ip) -> bool:
+        ...
+
+    @abstractmethod
+    def stats(self):
+        ...
+
+
+# Лимиты в памяти процесса. Записи хранятся в порядке последнего обращения,
+# поэтому простаивающие IP и переполнение вытесняются с головы списка
+class MemoryRateLimiter(RateLimitStore):
+    def __init__(self, limit, period, block_time, max_tracked):
+        super().__init__(limit, period, block_time, max_tracked)
+        self._entries = OrderedDict()
+        # Окончания текущих блокировок по возрастанию: срок блокировки одинаковый для всех IP
+        self._blocks = deque()
+
+    def _evict(self, now):
+        entries = self._entries
+        while entries:
+            ip, entry = next(iter(entries.items()))
+            if len(entries) <= self.max_tracked and now - entry[LAST_SEEN] < self.idle_ttl:
+                break
+            del entries[ip]
+            self.evicted_total += 1
+
+    def check(self, ip) -> bool:
+        now = time.monotonic()
+
+        entry = self._entries.get(ip)
+        if entry is None:
+            entry = [now, 0, 0, 0.0, now]
+            self._entries[ip] = entry
+        else:
+            self._entries.move_to_end(ip)
+        allowed, blocked = apply_hit(entry, now, self.limit, self.period, self.block_time)
+        self._evict(now)
+
+        if blocked:
+            self._blocks.append(entry[BLOCKED_UNTIL])
+            self._on_blocked(ip)
+        return allowed
+
+    async def allow(self, ip) -> bool:
+        return self.check(ip)
+
+    def stats(self):
+        now = time.monotonic()
+        blocks = self._blocks
+        while blocks and blocks[0] <= now:
+            blocks.popleft()
+        return {
+            "backend": "memory",
+            "tracked_ips": len(self._entries),
+            "blocked_ips": len(blocks),
+            "max_tracked_ips": self.max_tracked,
+            "blocked_total": self.blocked_total,
+            "evicted_total": self.evicted_total,
+        }
+
+
+# Лимиты в SQLite-файле: один файл на все воркеры и процессы на этой машине.
+# Каждое обращение выполняется в транзакции BEGIN IMMEDIATE, поэтому чтение
+# и обновление счётчиков атомарны между процессами
+class SQLiteRateLimiter(RateLimitStore):
+    CLEANUP_EVERY = 1000
+    # Как часто (в секундах) пересчитывать число IP в таблице для stats()
+    STATS_INTERVAL = 5.0
+
+    def __init__(self, limit, period, block_time, max_tracked, path):
+        super().__init__(limit, period, block_time, max_tracked)
+        self.path = path
+        self._lock = threading.Lock()
+        self._hits_since_cleanup = 0
+        self._tracked = 0
+        self._blocked_now = 0
+        self._stats_at = 0.0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            "ip TEXT PRIMARY KEY, window_start REAL, current INTEGER, previous INTEGER, "
+            "blocked_until REAL, last_seen REAL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rate_limit_last_seen ON rate_limit (last_seen)")
+
+    def _cleanup(self, now):
+        cursor = self._conn.execute("DELETE FROM rate_limit WHERE last_seen < ?", (now - self.idle_ttl,))
+        evicted = cursor.rowcount
+        overflow = self._conn.execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0] - self.max_tracked
+        if overflow > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM rate_limit WHERE ip IN "
+                "(SELECT ip FROM rate_limit ORDER BY last_seen LIMIT ?)",
+                (overflow,),
+            )
+            evicted += cursor.rowcount
+        self.evicted_total += max(evicted, 0)
+
+    def _refresh_stats(self, now):
+        # Таблица общая для всех процессов, поэтому счётчики в памяти не подходят: COUNT выполняется
+        # внутри check(), который и так работает в потоке, и не чаще раза в STATS_INTERVAL секунд
+        self._tracked, self._blocked_now = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(blocked_until > ?), 0) FROM rate_limit", (now,)
+        ).fetchone()
+        self._stats_at = now
+
+    def check(self, ip) -> bool:
+        # Время общее для всех процессов, поэтому wall clock, а не monotonic
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT window_start, current, previous, blocked_until, last_seen "
+                    "FROM rate_limit WHERE ip = ?",
+                    (ip,),
+                ).fetchone()
+                entry = list(row) if row else [now, 0, 0, 0.0, now]
+                allowed, blocked = apply_hit(entry, now, self.limit, self.period, self.block_time)
+                conn.execute(
+                    "INSERT INTO rate_limit (ip, window_start, current, previous, blocked_until, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(ip) DO UPDATE SET window_start = excluded.window_start, "
+                    "current = excluded.current, previous = excluded.previous, "
+                    "blocked_until = excluded.blocked_until, last_seen = excluded.last_seen",
+                    (ip, *entry),
+                )
+
+                self._hits_since_cleanup += 1
+                if self._hits_since_cleanup >= self.CLEANUP_EVERY:
+                    self._hits_since_cleanup = 0
+                    self._cleanup(now)
+                if now - self._stats_at >= self.STATS_INTERVAL:
+                    self._refresh_stats(now)
+
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if blocked:
+            self._on_blocked(ip)
+        return allowed
+
+    async def allow(self, ip) -> bool:
+        # sqlite3 блокирующий: ожидание блокировки файла уходит из event loop в поток
+        return await asyncio.to_thread(self.check, ip)
+
+    def stats(self):
+        # Значения на момент последнего пересчёта в check(), без обращения к файлу
+        return {
+            "backend": "sqlite",
+            "tracked_ips": self._tracked,
+            "blocked_ips": self._blocked_now,
+            "max_tracked_ips": self.max_tracked,
+            "blocked_total": self.blocked_total,
+            "evicted_total": self.evicted_total,
+        }
+
+
+def create_rate_limiter(backend, limit, period, block_time, max_tracked, sqlite_path=""):
+    if backend == "sqlite":
+        path = sqlite_path or os.path.join(tempfile.gettempdir(), "xui_subpage_rate_limit.sqlite3")
+        try:
+            return SQLiteRateLimiter(limit, period, block_time, max_tracked, path)
+        except Exception as e:
+            logging.error(f"[Subscription Page] SQLite rate limit store unavailable ({path}): {e}, using memory")
+    elif backend != "memory":
+        logging.warning(f"[Subscription Page] Unknown RATE_LIMIT_BACKEND '{backend}', using memory")
+    return MemoryRateLimiter(limit, period, block_time, max_tracked)
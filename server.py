@@ -0,0 +1,78 @@
+import logging
+import os
+
+import uvicorn
+
+from .settings import (
+    MODULE_PORT, SERVER_MODE, SERVER_HOST, SERVER_WORKERS, SERVER_GRACEFUL_TIMEOUT, RATE_LIMIT_BACKEND
+)
+
+# Отдельный процесс для веб-страницы (SERVER_MODE = "standalone").
+# Запуск из корня бота: python modules/xui_subpage/standalone.py
+# Приложение (web.py) здесь не импортируется: его создают воркеры uvicorn
+
+# Выставляется standalone.py до импорта пакета: процесс и его воркеры пропускают хуки бота
+STANDALONE_ENV = "XUI_SUBPAGE_STANDALONE"
+
+
+def is_standalone():
+    return os.environ.get(STANDALONE_ENV) == "1"
+
+
+def _available(module_name):
+    try:
+        __import__(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    if SERVER_MODE != "standalone":
+        logging.error(
+            "[Subscription Page] SERVER_MODE = \"%s\": страница уже запускается внутри бота. "
+            "Установите SERVER_MODE = \"standalone\" в settings.py",
+            SERVER_MODE,
+        )
+        return 1
+
+    if not is_standalone():
+        # Через python -m пакет импортируется раньше main(), и router.py уже выполнил настройку бота
+        logging.error(
+            "[Subscription Page] Запускайте страницу через standalone.py: python modules/xui_subpage/standalone.py"
+        )
+        return 1
+
+    workers = max(1, SERVER_WORKERS)
+    if workers > 1 and RATE_LIMIT_BACKEND == "memory":
+        logging.warning(
+            "[Subscription Page] %s воркеров с RATE_LIMIT_BACKEND = \"memory\": "
+            "у каждого воркера будут свои лимиты, используйте \"sqlite\"",
+            workers,
+        )
+
+    loop = "uvloop" if _available("uvloop") else "asyncio"
+    http = "httptools" if _available("httptools") else "h11"
+    logging.info(
+        "[Subscription Page] Запуск на %s:%s, воркеров: %s, loop: %s, http: %s",
+        SERVER_HOST, MODULE_PORT, workers, loop, http,
+    )
+
+    uvicorn.run(
+        f"{__package__}.web:app",
+        host=SERVER_HOST,
+        port=MODULE_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        log_level="warning",
+        access_log=False,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -104,6 +104,19 @@ RATE_LIMIT_PERIOD = 60
 # Время блокировки IP при превышении лимита (в секундах)
 RATE_LIMIT_BLOCK_TIME = 60
 
+# Сколько IP-адресов максимум отслеживать одновременно (защита памяти при сканировании)
+# При превышении забываются IP, которые дольше всех не делали запросов
+RATE_LIMIT_MAX_TRACKED_IPS = 100000
+
+# Где хранить счётчики запросов?
+# "memory" = в памяти процесса (подходит, когда страница работает в одном процессе)
+# "sqlite" = в общем SQLite-файле, лимит соблюдается сразу для всех воркеров на этой машине
+RATE_LIMIT_BACKEND = "memory"
+
+# Путь к SQLite-файлу для RATE_LIMIT_BACKEND = "sqlite"
+# Оставьте пустым (""), чтобы использовать файл во временной папке системы
+RATE_LIMIT_SQLITE_PATH = ""
+
 # ========================================
 # 📝 ТЕКСТЫ НА КНОПКАХ
 # ========================================
@@ -467,6 +480,137 @@ EASTER_CONFIG = {
     "effects": ["petals"]
 }
 
+# ========================================
+# ⚡ ПРОИЗВОДИТЕЛЬНОСТЬ
+# ========================================
+# Обычно менять не нужно. Эти настройки помогают странице выдерживать наплыв
+# пользователей во время массовых рассылок
+
+# Как часто (в секундах) проверять, не изменился ли index.html или VERSION на диске
+# Страница собирается один раз при старте и держится в памяти (с gzip/brotli версиями)
+INDEX_RELOAD_INTERVAL = 2
+
+# Встраивать данные подписки и тексты прямо в страницу, если она открыта с key_name?
+# True = страница показывает данные сразу, без дополнительного запроса к API
+# False = страница всегда одинаковая, данные загружаются отдельным запросом
+INLINE_INITIAL_DATA = True
+
+# Собирать JS и CSS страницы в два сжатых файла при запуске?
+# True = браузер скачивает 2 файла вместо 30 и кеширует их на год (имя файла меняется вместе с содержимым)
+# False = файлы подключаются по отдельности, как в исходниках (удобно при правке скриптов)
+# Собрать бандлы на диск вручную: python modules/xui_subpage/assets.py
+ASSET_BUNDLING = True
+
+# Загружать сторонние библиотеки (Font Awesome, jsQR) с этого сервера, а не с CDN?
+# True = страница не зависит от медленных или заблокированных CDN. Сначала скачайте файлы один раз командой:
+#   python modules/xui_subpage/vendor.py
+#   Пока файлы не скачаны, библиотека по-прежнему грузится с CDN
+# False = Font Awesome и jsQR грузятся с CDN, как раньше
+VENDOR_ASSETS = False
+
+# Создавать рядом со статическими файлами сжатые копии (.br и .gz) при запуске?
+# Браузер получает файлы в 3-5 раз меньше даже без nginx. Копии пересоздаются, если исходник изменился
+# Если папка static доступна только для чтения, файлы просто отдаются без сжатия
+STATIC_PRECOMPRESS = True
+
+# Кеш подписок для /api/sub: сколько секунд помнить найденный ключ
+# Чем больше значение, тем меньше нагрузка на базу, но тем дольше видны старые данные
+KEY_CACHE_TTL = 30
+
+# Сколько секунд помнить, что ключ НЕ найден (защита базы от перебора несуществующих ключей)
+KEY_CACHE_NEGATIVE_TTL = 10
+
+# Максимальное количество ключей в кеше (самые давно запрошенные вытесняются первыми)
+KEY_CACHE_MAX_SIZE = 10000
+
+# Сколько секунд помнить готовый список стран для VLESS селектора (/api/country-links)
+COUNTRY_LINKS_CACHE_TTL = 60
+
+# Сколько секунд помнить данные inbound'ов 3X-UI (название страны и порт)
+INBOUND_CACHE_TTL = 300
+
+# Сколько секунд ждать ответа одной панели 3X-UI, прежде чем пропустить её
+PANEL_TIMEOUT = 5
+
+# Как часто (в секундах) перечитывать список серверов из базы для VLESS селектора
+# Новые серверы появятся на странице не позже чем через это время
+TOPOLOGY_REFRESH_INTERVAL = 300
+
+# Пул соединений страницы с базой
+# Сколько соединений держать открытыми и сколько можно открыть сверх этого при наплыве.
+# Вместе с пулом бота сумма не должна превышать max_connections в PostgreSQL
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+
+# Сколько секунд ждать свободное соединение, прежде чем ответить ошибкой
+DB_POOL_TIMEOUT = 15
+
+# Через сколько секунд переоткрывать соединение (защита от обрывов по таймауту сервера/прокси)
+DB_POOL_RECYCLE = 1800
+
+# Проверять соединение перед выдачей из пула? Немного медленнее, но без ошибок после перезапуска базы
+DB_POOL_PRE_PING = True
+
+# Максимальное время (в секундах) одного SQL-запроса страницы. 0 = без ограничения. Только PostgreSQL
+DB_STATEMENT_TIMEOUT = 5
+
+# Отдавать метрики для Prometheus по адресу BASE_PATH + "metrics" (например, /connect/metrics)?
+# Там число и время запросов по маршрутам, время запросов к базе и к панелям 3X-UI,
+# заблокированные IP и занятость пула соединений.
+# По умолчанию выключено: включайте вместе с METRICS_TOKEN или закройте адрес в nginx
+METRICS_ENABLED = False
+
+# Токен для доступа к метрикам (заголовок Authorization: Bearer <токен>)
+# Пустая строка = метрики доступны всем, кто знает адрес. Лучше задать токен или закрыть адрес в nginx
+METRICS_TOKEN = ""
+
+# Добавлять к ответам API заголовок Server-Timing с разбивкой времени по этапам
+# (запрос к базе, логин в панель 3X-UI, получение inbound, ссылка VLESS, рисование QR)?
+# Разбивку видно в инструментах разработчика браузера (вкладка Network -> Timing)
+SERVER_TIMING_ENABLED = True
+
+# Доля запросов, для которых разбивка пишется в лог одной JSON-строкой (0.01 = 1% запросов)
+# 0 = ничего не писать
+TRACE_SAMPLE_RATE = 0.0
+
+# Как запускать веб-страницу?
+# "thread" = внутри процесса бота, в отдельном потоке (как раньше, ничего настраивать не нужно)
+# "standalone" = отдельным процессом с несколькими воркерами, бот его не запускает.
+#   Страница перестаёт делить процессор с ботом. Запуск из папки бота (например, отдельным systemd-сервисом):
+#   python modules/xui_subpage/standalone.py
+#   Кеши страницы живут в её процессе, поэтому изменения ключей видны после истечения KEY_CACHE_TTL
+SERVER_MODE = "thread"
+
+# Количество воркеров для SERVER_MODE = "standalone"
+# При нескольких воркерах используйте RATE_LIMIT_BACKEND = "sqlite", чтобы лимиты были общими
+SERVER_WORKERS = 2
+
+# На каком адресе слушать в режиме "standalone"
+SERVER_HOST = "0.0.0.0"
+
+# Сколько секунд дать текущим запросам на завершение при остановке сервера
+SERVER_GRACEFUL_TIMEOUT = 10
+
+# Сколько памяти (в байтах) отдать под кеш готовых QR-кодов. 16 МБ хватает на тысячи кодов
+QR_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Сколько потоков рисуют QR-коды (рендер не блокирует остальные запросы)
+QR_RENDER_THREADS = 2
+
+# Адрес Happ API для отправки подписки на телевизор (код с экрана TV добавляется в конец)
+# Менять не нужно, кроме тестирования с локальной заглушкой
+HAPP_TV_API_URL = "https://check.happ.su/sendtv/"
+
+# Сколько запросов к Happ API может выполняться одновременно
+HAPP_TV_CONCURRENCY = 20
+
+# Сколько секунд ждать подключения к Happ API и сколько секунд ждать ответа
+HAPP_TV_CONNECT_TIMEOUT = 5
+HAPP_TV_TIMEOUT = 15
+
+# Сколько раз повторить запрос, если не удалось подключиться к Happ API
+HAPP_TV_RETRIES = 2
+
 # ========================================
 # ✅ НАСТРОЙКА ЗАВЕРШЕНА
 # ========================================
@@ -0,0 +1,20 @@
+import os
+import sys
+from importlib import import_module
+
+# Запуск отдельного веб-процесса (SERVER_MODE = "standalone") из корня бота:
+#   python modules/xui_subpage/standalone.py
+# Файл запускается по пути, а не через -m: иначе Python сначала импортирует пакет модуля,
+# и router.py успевает зарегистрировать хуки и поменять настройки бота в этом процессе.
+# Здесь переменная окружения выставляется до первого импорта пакета
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_ROOT = os.path.dirname(os.path.dirname(MODULE_DIR))
+PACKAGE = f"{os.path.basename(os.path.dirname(MODULE_DIR))}.{os.path.basename(MODULE_DIR)}"
+
+if __name__ == "__main__":
+    # То же имя, что server.STANDALONE_ENV (server.py до этого момента импортировать нельзя)
+    os.environ["XUI_SUBPAGE_STANDALONE"] = "1"
+    # Вместо папки модуля: её файлы (settings.py, web.py...) не должны импортироваться как модули верхнего уровня
+    sys.path[0] = BOT_ROOT
+    raise SystemExit(import_module(f"{PACKAGE}.server").main())
@@ -92,9 +92,27 @@ async function apiDelete(endpoint, options = {}) {
     return await response.json();
 }
 
+function readEmbeddedJson(elementId) {
+    const element = document.getElementById(elementId);
+    if (!element) {
+        return null;
+    }
+
+    try {
+        return JSON.parse(element.textContent);
+    } catch (error) {
+        return null;
+    }
+}
+
 async function getSettings() {
-    // Добавляем timestamp чтобы избежать кеширования
-    return await apiGet('api/settings', { _t: Date.now() });
+    // Настройки встроены в index.html, запрос нужен только если их там нет
+    const embedded = readEmbeddedJson('app-settings');
+    if (embedded) {
+        return embedded;
+    }
+
+    return await apiGet('api/settings', { v: window.SETTINGS_VERSION });
 }
 
 async function getSubscription(keyName) {
@@ -105,6 +123,11 @@ async function getSubscription(keyName) {
     return await apiGet('api/sub', { key_name: keyName, _t: Date.now() });
 }
 
+async function getBootstrap(keyName, language) {
+    // Настройки, тексты и подписка одним запросом
+    return await apiGet('api/bootstrap', { key_name: keyName, language });
+}
+
 async function getCountryLinks(keyName) {
     if (!keyName) {
         throw new Error('key_name is required');
@@ -113,8 +136,67 @@ async function getCountryLinks(keyName) {
     return await apiGet('api/country-links', { key_name: keyName });
 }
 
+async function streamCountryLinks(keyName, onEntry) {
+    if (!keyName) {
+        throw new Error('key_name is required');
+    }
+
+    // Сервер отдаёт страны построчно (NDJSON) по мере ответа панелей
+    const response = await apiRequest(
+        `api/country-links/stream?key_name=${encodeURIComponent(keyName)}`,
+        { method: 'GET' }
+    );
+
+    let count = 0;
+    const handleLine = (line) => {
+        if (!line.trim()) {
+            return false;
+        }
+        const entry = JSON.parse(line);
+        if (entry.done) {
+            return true;
+        }
+        count += 1;
+        onEntry(entry);
+        return false;
+    };
+
+    if (!response.body || typeof response.body.getReader !== 'function') {
+        const text = await response.text();
+        for (const line of text.split('\n')) {
+            if (handleLine(line)) {
+                break;
+            }
+        }
+        return count;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+        const lines = buffer.split('\n');
+        buffer = done ? '' : lines.pop();
+        for (const line of lines) {
+            if (handleLine(line)) {
+                reader.cancel().catch(() => {});
+                return count;
+            }
+        }
+
+        if (done) {
+            return count;
+        }
+    }
+}
+
 async function getTexts(language = 'ru') {
-    return await apiGet('api/texts', { language });
+    // Версия в URL: браузер берёт тексты из кеша, пока не сменится VERSION
+    return await apiGet('api/texts', { language, v: window.APP_VERSION });
 }
 
 async function startAuth(initData) {
@@ -143,9 +225,12 @@ window.api = {
     put: apiPut,
     delete: apiDelete,
 
+    readEmbeddedJson,
     getSettings,
     getSubscription,
+    getBootstrap,
     getCountryLinks,
+    streamCountryLinks,
     getTexts,
     startAuth,
     getHealth,
@@ -0,0 +1,62 @@
+// Загрузка тяжёлых частей страницы по требованию. Список скриптов для каждой
+// части сервер встраивает в страницу (#app-features), порядок в списке важен
+const featureLoads = {};
+let featureScripts = null;
+
+function getFeatureScripts() {
+    if (featureScripts === null) {
+        const element = document.getElementById('app-features');
+        try {
+            featureScripts = element ? JSON.parse(element.textContent) || {} : {};
+        } catch (error) {
+            featureScripts = {};
+        }
+    }
+    return featureScripts;
+}
+
+function loadScript(src) {
+    return new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.async = false;
+        script.onload = () => resolve();
+        script.onerror = () => reject(new Error(`Failed to load ${src}`));
+        document.head.appendChild(script);
+    });
+}
+
+function loadFeature(name) {
+    if (!featureLoads[name]) {
+        const scripts = getFeatureScripts()[name] || [];
+        featureLoads[name] = scripts
+            .reduce((chain, src) => chain.then(() => loadScript(src)), Promise.resolve())
+            .catch((error) => {
+                // Следующая попытка (например, повторный клик) загрузит заново
+                delete featureLoads[name];
+                throw error;
+            });
+    }
+    return featureLoads[name];
+}
+
+// Заглушка глобальной функции: загружает часть страницы, после чего загруженный
+// скрипт подменяет window[functionName] настоящей функцией и вызов передаётся ей
+function lazyFunction(feature, functionName) {
+    const stub = function (...args) {
+        return loadFeature(feature).then(() => {
+            const loaded = window[functionName];
+            if (typeof loaded === 'function' && loaded !== stub) {
+                return loaded.apply(this, args);
+            }
+            return undefined;
+        });
+    };
+    window[functionName] = stub;
+}
+
+lazyFunction('qr-scanner', 'showTVQRModal');
+lazyFunction('share', 'sharePageLink');
+lazyFunction('vless-selector', 'initVlessSelector');
+
+window.loadFeature = loadFeature;
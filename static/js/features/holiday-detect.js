@@ -0,0 +1,70 @@
+// ========================================
+// 🎄 ПРАЗДНИКИ: ЗАПУСК
+// ========================================
+// Лёгкая часть праздничных тем, загружается всегда. Какой праздник идёт сегодня,
+// определяет сервер (settings.holidays.active). Эффекты (holidays.js)
+// подгружаются, только если праздник действительно идёт
+
+const HOLIDAY_DISABLED_KEY = 'holiday_disabled';
+const HOLIDAY_GREETING_SHOWN_KEY = 'holiday_greeting_shown';
+
+/**
+ * Проверяет настройки и запускает праздничную тему, если сегодня праздник
+ */
+function startHolidays(settings) {
+    // Если праздники отключены на сервере — очищаем все данные
+    if (!settings || !settings.holidays || !settings.holidays.enabled) {
+        clearHolidayData();
+        return;
+    }
+
+    // Проверяем, отключил ли пользователь праздники
+    if (isHolidayDisabledByUser()) {
+        return;
+    }
+
+    const holiday = settings.holidays.active;
+    if (!holiday) {
+        return;
+    }
+
+    window.loadFeature('holidays')
+        .then(() => window.initHolidays(settings, holiday))
+        .catch((error) => console.error('Failed to load holidays:', error));
+}
+
+/**
+ * Проверяет, отключил ли пользователь праздники
+ */
+function isHolidayDisabledByUser() {
+    return localStorage.getItem(HOLIDAY_DISABLED_KEY) === 'true';
+}
+
+/**
+ * Полная очистка данных праздников (когда отключены на сервере)
+ */
+function clearHolidayData() {
+    // Очищаем localStorage
+    localStorage.removeItem(HOLIDAY_DISABLED_KEY);
+    localStorage.removeItem(HOLIDAY_GREETING_SHOWN_KEY);
+
+    // Удаляем все праздничные классы с body
+    document.body.className = document.body.className.replace(/holiday-\S+/g, '');
+
+    // Удаляем все праздничные элементы если есть
+    var effects = document.getElementById('holiday-effects');
+    if (effects && effects.parentNode) effects.parentNode.removeChild(effects);
+
+    var greeting = document.getElementById('holiday-greeting');
+    if (greeting && greeting.parentNode) greeting.parentNode.removeChild(greeting);
+
+    var badge = document.querySelector('.holiday-logo-badge');
+    if (badge && badge.parentNode) badge.parentNode.removeChild(badge);
+
+    var btn = document.querySelector('.holiday-disable-btn');
+    if (btn && btn.parentNode) btn.parentNode.removeChild(btn);
+}
+
+// Экспорт
+window.startHolidays = startHolidays;
+window.clearHolidayData = clearHolidayData;
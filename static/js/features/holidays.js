@@ -4,155 +4,213 @@
 
 let holidayConfig = null;
 let currentHoliday = null;
-const HOLIDAY_DISABLED_KEY = 'holiday_disabled';
-const HOLIDAY_GREETING_SHOWN_KEY = 'holiday_greeting_shown';
 
 /**
- * Инициализирует праздничные темы
+ * Включает праздничное оформление. Загружается по требованию из holiday-detect.js,
+ * только когда праздник действительно идёт
  */
-function initHolidays(settings) {
-    // Если праздники отключены на сервере — очищаем все данные
-    if (!settings || !settings.holidays || !settings.holidays.enabled) {
-        clearHolidayData();
-        return;
-    }
-    
+function initHolidays(settings, holiday) {
     holidayConfig = settings.holidays;
-    
-    // Проверяем, отключил ли пользователь праздники
-    if (isHolidayDisabledByUser()) {
-        return;
-    }
-    
-    // Определяем текущий праздник
-    currentHoliday = detectCurrentHoliday();
-    
-    if (currentHoliday) {
-        applyHolidayTheme(currentHoliday);
-        createHolidayEffects(currentHoliday);
-        showHolidayGreeting(currentHoliday);
-        
-        if (holidayConfig.user_can_disable) {
-            createDisableButton();
-        }
+    currentHoliday = holiday;
+
+    applyHolidayTheme(currentHoliday);
+    createHolidayEffects(currentHoliday);
+    showHolidayGreeting(currentHoliday);
+
+    if (holidayConfig.user_can_disable) {
+        createDisableButton();
     }
 }
 
 /**
- * Определяет текущий праздник по дате
+ * Применяет праздничную тему
  */
-function detectCurrentHoliday() {
-    const now = new Date();
-    const month = now.getMonth() + 1; // 1-12
-    const day = now.getDate();
-    const year = now.getFullYear();
+function applyHolidayTheme(holiday) {
+    document.body.classList.add('holiday-' + holiday.theme);
     
-    // Проверяем Пасху (динамическая дата)
-    const easterHoliday = checkEaster(year, month, day);
-    if (easterHoliday) {
-        return easterHoliday;
+    // Добавляем эмодзи к логотипу (опционально)
+    const logo = document.querySelector('.header-logo');
+    if (logo && holiday.emoji) {
+        const badge = document.createElement('span');
+        badge.className = 'holiday-logo-badge';
+        badge.textContent = holiday.emoji;
+        badge.style.cssText = 'position: absolute; top: -8px; right: -8px; font-size: 16px;';
+        logo.parentElement.style.position = 'relative';
+        logo.parentElement.appendChild(badge);
     }
-    
-    // Проверяем обычные праздники
-    const holidays = holidayConfig.list;
-    
-    for (const [key, holiday] of Object.entries(holidays)) {
-        // Пропускаем выключенные праздники
-        if (holiday.enabled === false) {
-            continue;
-        }
-        
-        if (isDateInRange(month, day, holiday)) {
-            return {
-                key: key,
-                ...holiday
-            };
-        }
+}
+
+/**
+ * Состояние праздничных эффектов. Все эффекты работают от одного цикла
+ * requestAnimationFrame: новые частицы появляются по расписанию, старые
+ * удаляются по истечении срока, общее число частиц ограничено.
+ * В скрытой вкладке цикл и CSS-анимации стоят на паузе
+ */
+const holidayEffects = {
+    container: null,
+    particles: [],
+    spawners: [],
+    pending: [],
+    frameId: null,
+    pausedAt: null,
+    maxParticles: 0,
+    motionQuery: null
+};
+
+/**
+ * Максимум частиц на экране с учётом слабых устройств
+ */
+function getParticleLimit() {
+    if (document.body.classList.contains('mobile-lite')) {
+        return 10;
     }
-    
-    return null;
+    return window.innerWidth < 480 ? 20 : 45;
+}
+
+function prefersReducedMotion() {
+    return Boolean(holidayEffects.motionQuery && holidayEffects.motionQuery.matches);
 }
 
 /**
- * Проверяет, попадает ли дата в диапазон праздника
+ * Сколько ещё частиц можно добавить
  */
-function isDateInRange(month, day, holiday) {
-    const startMonth = holiday.start_month;
-    const startDay = holiday.start_day;
-    const endMonth = holiday.end_month;
-    const endDay = holiday.end_day;
-    
-    // Создаём даты для сравнения (используем фиктивный год)
-    const currentDate = month * 100 + day;
-    const startDate = startMonth * 100 + startDay;
-    const endDate = endMonth * 100 + endDay;
-    
-    // Обычный случай (в пределах одного года)
-    if (startDate <= endDate) {
-        return currentDate >= startDate && currentDate <= endDate;
+function particleRoom() {
+    return Math.max(0, holidayEffects.maxParticles - holidayEffects.particles.length);
+}
+
+/**
+ * Добавляет частицу. lifetime в мс, без него частица живёт, пока включены эффекты
+ */
+function addParticle(element, lifetime) {
+    holidayEffects.container.appendChild(element);
+    holidayEffects.particles.push({
+        element: element,
+        expiresAt: lifetime ? performance.now() + lifetime : Infinity
+    });
+}
+
+/**
+ * Повторяющееся появление частиц. interval — число или функция, возвращающая мс
+ */
+function addSpawner(spawn, interval, firstDelay) {
+    const now = performance.now();
+    const nextInterval = typeof interval === 'function' ? interval : function() { return interval; };
+    holidayEffects.spawners.push({
+        spawn: spawn,
+        nextInterval: nextInterval,
+        nextAt: now + (firstDelay === undefined ? nextInterval() : firstDelay)
+    });
+}
+
+/**
+ * Однократный вызов через delay мс (вместо setTimeout, тоже в общем цикле)
+ */
+function scheduleOnce(callback, delay) {
+    holidayEffects.pending.push({ callback: callback, at: performance.now() + delay });
+}
+
+function needsFrames() {
+    return holidayEffects.spawners.length > 0 ||
+        holidayEffects.pending.length > 0 ||
+        holidayEffects.particles.some(function(particle) { return particle.expiresAt !== Infinity; });
+}
+
+function effectsFrame(now) {
+    holidayEffects.frameId = null;
+    if (!holidayEffects.container) {
+        return;
+    }
+
+    // Удаляем частицы, у которых закончилась анимация
+    holidayEffects.particles = holidayEffects.particles.filter(function(particle) {
+        if (particle.expiresAt <= now) {
+            particle.element.remove();
+            return false;
+        }
+        return true;
+    });
+
+    const due = holidayEffects.pending.filter(function(task) { return task.at <= now; });
+    holidayEffects.pending = holidayEffects.pending.filter(function(task) { return task.at > now; });
+    due.forEach(function(task) { task.callback(); });
+
+    holidayEffects.spawners.forEach(function(spawner) {
+        if (now >= spawner.nextAt) {
+            spawner.spawn();
+            spawner.nextAt = now + spawner.nextInterval();
+        }
+    });
+
+    requestEffectsFrame();
+}
+
+function requestEffectsFrame() {
+    if (holidayEffects.frameId === null && holidayEffects.pausedAt === null && needsFrames()) {
+        holidayEffects.frameId = requestAnimationFrame(effectsFrame);
     }
-    
-    // Переход через новый год (например, 25 декабря - 10 января)
-    return currentDate >= startDate || currentDate <= endDate;
 }
 
 /**
- * Проверяет Пасху
+ * Пауза в скрытой вкладке: расписание сдвигается на время паузы,
+ * чтобы после возврата не было залпа накопившихся частиц
  */
-function checkEaster(year, month, day) {
-    if (!holidayConfig.easter_dates || !holidayConfig.easter_config) {
-        return null;
+function handleEffectsVisibility() {
+    if (!holidayEffects.container) {
+        return;
     }
-    
-    const config = holidayConfig.easter_config;
-    
-    // Пропускаем если Пасха выключена
-    if (config.enabled === false) {
-        return null;
+
+    if (document.hidden) {
+        if (holidayEffects.pausedAt === null) {
+            holidayEffects.pausedAt = performance.now();
+            holidayEffects.container.classList.add('paused');
+            if (holidayEffects.frameId !== null) {
+                cancelAnimationFrame(holidayEffects.frameId);
+                holidayEffects.frameId = null;
+            }
+        }
+        return;
     }
-    
-    const easterDate = holidayConfig.easter_dates[year];
-    if (!easterDate) {
-        return null;
+
+    if (holidayEffects.pausedAt !== null) {
+        const pause = performance.now() - holidayEffects.pausedAt;
+        holidayEffects.pausedAt = null;
+        holidayEffects.particles.forEach(function(particle) { particle.expiresAt += pause; });
+        holidayEffects.pending.forEach(function(task) { task.at += pause; });
+        holidayEffects.spawners.forEach(function(spawner) { spawner.nextAt += pause; });
+        holidayEffects.container.classList.remove('paused');
+        requestEffectsFrame();
     }
-    
-    const [easterMonth, easterDay] = easterDate;
-    
-    // Вычисляем диапазон
-    const easterDateObj = new Date(year, easterMonth - 1, easterDay);
-    const currentDateObj = new Date(year, month - 1, day);
-    
-    const daysDiff = Math.round((currentDateObj - easterDateObj) / (1000 * 60 * 60 * 24));
-    
-    if (daysDiff >= -config.days_before && daysDiff <= config.days_after) {
-        return {
-            key: 'easter',
-            theme: config.theme,
-            emoji: config.emoji,
-            greeting: config.greeting,
-            effects: config.effects
-        };
+}
+
+function handleMotionPreference() {
+    if (prefersReducedMotion()) {
+        stopHolidayEffects();
     }
-    
-    return null;
 }
 
 /**
- * Применяет праздничную тему
+ * Останавливает цикл и удаляет все частицы
  */
-function applyHolidayTheme(holiday) {
-    document.body.classList.add('holiday-' + holiday.theme);
-    
-    // Добавляем эмодзи к логотипу (опционально)
-    const logo = document.querySelector('.header-logo');
-    if (logo && holiday.emoji) {
-        const badge = document.createElement('span');
-        badge.className = 'holiday-logo-badge';
-        badge.textContent = holiday.emoji;
-        badge.style.cssText = 'position: absolute; top: -8px; right: -8px; font-size: 16px;';
-        logo.parentElement.style.position = 'relative';
-        logo.parentElement.appendChild(badge);
+function stopHolidayEffects() {
+    if (holidayEffects.frameId !== null) {
+        cancelAnimationFrame(holidayEffects.frameId);
     }
+    document.removeEventListener('visibilitychange', handleEffectsVisibility);
+    if (holidayEffects.motionQuery && holidayEffects.motionQuery.removeEventListener) {
+        holidayEffects.motionQuery.removeEventListener('change', handleMotionPreference);
+    }
+
+    const container = holidayEffects.container;
+    if (container && container.parentNode) {
+        container.parentNode.removeChild(container);
+    }
+
+    holidayEffects.container = null;
+    holidayEffects.particles = [];
+    holidayEffects.spawners = [];
+    holidayEffects.pending = [];
+    holidayEffects.frameId = null;
+    holidayEffects.pausedAt = null;
 }
 
 /**
@@ -162,144 +220,156 @@ function createHolidayEffects(holiday) {
     if (!holiday.effects || holiday.effects.length === 0) {
         return;
     }
-    
+
+    holidayEffects.motionQuery = window.matchMedia ? window.matchMedia('(prefers-reduced-motion: reduce)') : null;
+    // Пользователь попросил систему уменьшить движение — эффекты не запускаем
+    if (prefersReducedMotion()) {
+        return;
+    }
+
     const container = document.createElement('div');
     container.className = 'holiday-effects';
     container.id = 'holiday-effects';
     document.body.appendChild(container);
-    
+
+    holidayEffects.container = container;
+    holidayEffects.maxParticles = getParticleLimit();
+    holidayEffects.pausedAt = null;
+
     holiday.effects.forEach(function(effect) {
         switch (effect) {
             case 'snow':
-                createSnowEffect(container);
+                createSnowEffect();
                 break;
             case 'hearts':
-                createHeartsEffect(container);
+                createHeartsEffect();
                 break;
             case 'petals':
-                createPetalsEffect(container);
+                createPetalsEffect();
                 break;
             case 'confetti':
-                createConfettiEffect(container);
+                createConfettiEffect();
                 break;
             case 'bats':
-                createBatsEffect(container);
+                createBatsEffect();
                 break;
             case 'fireworks':
-                createFireworksEffect(container);
+                createFireworksEffect();
                 break;
         }
     });
+
+    document.addEventListener('visibilitychange', handleEffectsVisibility);
+    if (holidayEffects.motionQuery && holidayEffects.motionQuery.addEventListener) {
+        holidayEffects.motionQuery.addEventListener('change', handleMotionPreference);
+    }
+    handleEffectsVisibility();
+    requestEffectsFrame();
 }
 
 /**
  * Снежинки (постоянный снегопад)
  */
-function createSnowEffect(container) {
+function createSnowEffect() {
     const snowflakes = ['❄', '❅', '❆', '✻', '✼'];
     const isMobile = window.innerWidth < 480;
-    
+
     function createSnowflake() {
+        if (particleRoom() < 1) {
+            return;
+        }
+
         const flake = document.createElement('div');
         flake.className = 'holiday-particle snowflake';
         flake.textContent = snowflakes[Math.floor(Math.random() * snowflakes.length)];
-        
+
         const duration = Math.random() * 5 + 8; // 8-13 секунд
-        flake.style.cssText = 
+        flake.style.cssText =
             'left: ' + (Math.random() * 100) + '%; ' +
             'font-size: ' + (Math.random() * 8 + 12) + 'px; ' +
             'animation-duration: ' + duration + 's; ' +
             'opacity: ' + (Math.random() * 0.3 + 0.5) + ';';
-        
-        container.appendChild(flake);
-        
-        // Удаляем снежинку после окончания анимации
-        setTimeout(function() {
-            if (flake.parentNode) {
-                flake.parentNode.removeChild(flake);
-            }
-        }, duration * 1000);
+
+        // Снежинка удаляется после окончания анимации
+        addParticle(flake, duration * 1000);
     }
-    
+
     // Начальная порция снежинок
     const initialCount = isMobile ? 15 : 30;
     for (let i = 0; i < initialCount; i++) {
-        setTimeout(function() {
-            createSnowflake();
-        }, Math.random() * 3000);
+        scheduleOnce(createSnowflake, Math.random() * 3000);
     }
-    
+
     // Постоянно создаём новые снежинки
-    const interval = isMobile ? 800 : 400; // мс между снежинками
-    setInterval(createSnowflake, interval);
+    addSpawner(createSnowflake, isMobile ? 800 : 400); // мс между снежинками
 }
 
 /**
  * Сердечки
  */
-function createHeartsEffect(container) {
+function createHeartsEffect() {
     const hearts = ['❤', '💕', '💗', '💖', '💝'];
-    const count = window.innerWidth < 480 ? 12 : 25;
-    
+    const count = Math.min(window.innerWidth < 480 ? 12 : 25, particleRoom());
+
     for (let i = 0; i < count; i++) {
         const heart = document.createElement('div');
         heart.className = 'holiday-particle heart';
         heart.textContent = hearts[Math.floor(Math.random() * hearts.length)];
-        heart.style.cssText = 
+        heart.style.cssText =
             'left: ' + (Math.random() * 100) + '%; ' +
             'font-size: ' + (Math.random() * 8 + 14) + 'px; ' +
             'animation-duration: ' + (Math.random() * 4 + 6) + 's; ' +
             'animation-delay: ' + (Math.random() * 6) + 's;';
-        container.appendChild(heart);
+        addParticle(heart);
     }
 }
 
 /**
  * Лепестки
  */
-function createPetalsEffect(container) {
-    const count = window.innerWidth < 480 ? 15 : 30;
-    
+function createPetalsEffect() {
+    const count = Math.min(window.innerWidth < 480 ? 15 : 30, particleRoom());
+
     for (let i = 0; i < count; i++) {
         const petal = document.createElement('div');
         petal.className = 'holiday-particle petal';
         const size = Math.random() * 8 + 10;
-        petal.style.cssText = 
+        petal.style.cssText =
             'left: ' + (Math.random() * 100) + '%; ' +
             'width: ' + size + 'px; ' +
             'height: ' + size + 'px; ' +
             'animation-duration: ' + (Math.random() * 4 + 6) + 's; ' +
             'animation-delay: ' + (Math.random() * 6) + 's;';
-        container.appendChild(petal);
+        addParticle(petal);
     }
 }
 
 /**
  * Конфетти
  */
-function createConfettiEffect(container) {
-    const count = window.innerWidth < 480 ? 20 : 40;
-    
+function createConfettiEffect() {
+    const count = Math.min(window.innerWidth < 480 ? 20 : 40, particleRoom());
+
     for (let i = 0; i < count; i++) {
         const confetti = document.createElement('div');
         confetti.className = 'holiday-particle confetti';
         const size = Math.random() * 6 + 6;
-        confetti.style.cssText = 
+        confetti.style.cssText =
             'left: ' + (Math.random() * 100) + '%; ' +
             'width: ' + size + 'px; ' +
             'height: ' + size + 'px; ' +
             'animation-duration: ' + (Math.random() * 3 + 4) + 's; ' +
             'animation-delay: ' + (Math.random() * 5) + 's;';
-        container.appendChild(confetti);
+        addParticle(confetti);
     }
 }
 
 /**
  * Летучие мыши
  */
-function createBatsEffect(container) {
-    const count = window.innerWidth < 480 ? 3 : 6;
-    
+function createBatsEffect() {
+    const count = Math.min(window.innerWidth < 480 ? 3 : 6, particleRoom());
+
     for (let i = 0; i < count; i++) {
         const bat = document.createElement('div');
         bat.className = 'holiday-particle bat';
@@ -308,51 +378,41 @@ function createBatsEffect(container) {
         bat.style.top = Math.random() * 30 + 10 + '%';
         bat.style.animationDuration = (Math.random() * 4 + 6) + 's';
         bat.style.animationDelay = (Math.random() * 3) + 's';
-        container.appendChild(bat);
+        addParticle(bat);
     }
 }
 
 /**
  * Фейерверки (периодические)
  */
-function createFireworksEffect(container) {
+function createFireworksEffect() {
     function launchFirework() {
         const colors = ['#ff0000', '#ffd700', '#00ff00', '#00bfff', '#ff69b4', '#ffffff'];
         const x = Math.random() * (window.innerWidth - 100) + 50;
         const y = Math.random() * (window.innerHeight / 3) + 50;
-        
-        for (let i = 0; i < 12; i++) {
+        const sparks = Math.min(12, particleRoom());
+
+        for (let i = 0; i < sparks; i++) {
             const spark = document.createElement('div');
             spark.className = 'firework';
             spark.style.left = x + 'px';
             spark.style.top = y + 'px';
-            
+
             // Разлёт в разные стороны
             const angle = (i / 12) * Math.PI * 2;
             const distance = 30 + Math.random() * 40;
             spark.style.setProperty('--fx', Math.cos(angle) * distance + 'px');
             spark.style.setProperty('--fy', Math.sin(angle) * distance + 'px');
-            
+
             const color = colors[Math.floor(Math.random() * colors.length)];
             spark.style.background = color;
             spark.style.color = color;
-            container.appendChild(spark);
-            
-            setTimeout(function() {
-                if (spark.parentNode) {
-                    spark.parentNode.removeChild(spark);
-                }
-            }, 1300);
+            addParticle(spark, 1300);
         }
     }
-    
-    // Запускаем фейерверк каждые 4-7 секунд
-    setInterval(function() {
-        launchFirework();
-    }, 4000 + Math.random() * 3000);
-    
-    // Первый залп через 2 секунды
-    setTimeout(launchFirework, 2000);
+
+    // Залп каждые 4-7 секунд, первый через 2 секунды
+    addSpawner(launchFirework, function() { return 4000 + Math.random() * 3000; }, 2000);
 }
 
 /**
@@ -425,8 +485,7 @@ function disableHoliday() {
     // Удаляем все праздничные элементы
     document.body.className = document.body.className.replace(/holiday-\S+/g, '');
     
-    var effects = document.getElementById('holiday-effects');
-    if (effects) effects.parentNode.removeChild(effects);
+    stopHolidayEffects();
     
     var greeting = document.getElementById('holiday-greeting');
     if (greeting) greeting.parentNode.removeChild(greeting);
@@ -443,13 +502,6 @@ function disableHoliday() {
     }
 }
 
-/**
- * Проверяет, отключил ли пользователь праздники
- */
-function isHolidayDisabledByUser() {
-    return localStorage.getItem(HOLIDAY_DISABLED_KEY) === 'true';
-}
-
 /**
  * Сбрасывает отключение праздников (для нового праздника)
  */
@@ -457,34 +509,8 @@ function resetHolidayDisabled() {
     localStorage.removeItem(HOLIDAY_DISABLED_KEY);
 }
 
-/**
- * Полная очистка данных праздников (когда отключены на сервере)
- */
-function clearHolidayData() {
-    // Очищаем localStorage
-    localStorage.removeItem(HOLIDAY_DISABLED_KEY);
-    localStorage.removeItem(HOLIDAY_GREETING_SHOWN_KEY);
-    
-    // Удаляем все праздничные классы с body
-    document.body.className = document.body.className.replace(/holiday-\S+/g, '');
-    
-    // Удаляем все праздничные элементы если есть
-    var effects = document.getElementById('holiday-effects');
-    if (effects && effects.parentNode) effects.parentNode.removeChild(effects);
-    
-    var greeting = document.getElementById('holiday-greeting');
-    if (greeting && greeting.parentNode) greeting.parentNode.removeChild(greeting);
-    
-    var badge = document.querySelector('.holiday-logo-badge');
-    if (badge && badge.parentNode) badge.parentNode.removeChild(badge);
-    
-    var btn = document.querySelector('.holiday-disable-btn');
-    if (btn && btn.parentNode) btn.parentNode.removeChild(btn);
-}
-
 // Экспорт
 window.initHolidays = initHolidays;
 window.closeHolidayGreeting = closeHolidayGreeting;
 window.disableHoliday = disableHoliday;
-window.resetHolidayDisabled = resetHolidayDisabled;
-window.clearHolidayData = clearHolidayData;
\ No newline at end of file
+window.resetHolidayDisabled = resetHolidayDisabled;
\ No newline at end of file
@@ -37,6 +37,11 @@ function t(key) {
     return appTexts?.[key] || key;
 }
 
+function applyAppTexts(data) {
+    appTexts = data?.texts || {};
+    return data?.language || 'ru';
+}
+
 async function loadAppTexts(language = 'ru') {
     try {
         const data = await window.api.getTexts(language);
@@ -165,6 +170,7 @@ window.detectUserLanguage = detectUserLanguage;
 window.changeLanguage = changeLanguage;
 window.updatePageLanguage = updatePageLanguage;
 window.loadAppTexts = loadAppTexts;
+window.applyAppTexts = applyAppTexts;
 window.initializeLanguage = initializeLanguage;
 window.t = t;
 
@@ -1,13 +1,13 @@
 
 let subscriptionData = null;
 
-async function loadSubscription(keyName) {
+async function loadSubscription(keyName, preloaded = null) {
     try {
         if (!keyName) {
             throw new Error('key_name is required');
         }
 
-        subscriptionData = await window.api.getSubscription(keyName);
+        subscriptionData = preloaded || await window.api.getSubscription(keyName);
 
         const link = subscriptionData.link;
         const isCryptoLink = link && (link.startsWith('happ://crypt3/') || link.startsWith('happ://crypt/'));
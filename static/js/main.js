@@ -1,4 +1,5 @@
 let appSettings = null;
+let bootstrapData = null;
 let currentSubscriptionLink = '';
 let currentSelectedApp = null;
 
@@ -15,9 +16,31 @@ function applyMobileOptimizations() {
   }
 }
 
+async function loadBootstrapData() {
+  const params = new URLSearchParams(window.location.search);
+  const keyName = params.get('key_name');
+  const embeddedSettings = window.api.readEmbeddedJson('app-settings');
+
+  // Сервер уже встроил подписку и тексты в страницу
+  const inlined = window.api.readEmbeddedJson('app-bootstrap');
+  if (inlined) {
+    bootstrapData = { settings: embeddedSettings, ...inlined };
+    return;
+  }
+
+  const language = window.detectUserLanguage(embeddedSettings?.language || null);
+
+  try {
+    bootstrapData = await window.api.getBootstrap(keyName, language);
+  } catch (err) {
+    // Если общий запрос не удался, данные загрузятся по отдельности
+    bootstrapData = null;
+  }
+}
+
 async function loadAppSettings() {
   try {
-    appSettings = await window.api.getSettings();
+    appSettings = bootstrapData?.settings || await window.api.getSettings();
     window.appSettings = appSettings;
 
     if (appSettings.base_path && window.updateBasePath) {
@@ -30,7 +53,11 @@ async function loadAppSettings() {
       window.setCurrentLanguage(window.detectUserLanguage());
     }
 
-    await window.loadAppTexts(window.getCurrentLanguage());
+    if (bootstrapData?.texts && bootstrapData.texts.language === window.getCurrentLanguage()) {
+      window.applyAppTexts(bootstrapData.texts);
+    } else {
+      await window.loadAppTexts(window.getCurrentLanguage());
+    }
 
     window.buildPlatformConfigs(appSettings);
 
@@ -51,9 +78,9 @@ async function loadAppSettings() {
       window.setHapticEnabled(appSettings.haptic_enabled !== false);
     }
 
-    // Инициализируем праздничные темы
-    if (window.initHolidays) {
-      window.initHolidays(appSettings);
+    // Инициализируем праздничные темы (эффекты загрузятся, только если сегодня праздник)
+    if (window.startHolidays) {
+      window.startHolidays(appSettings);
     }
 
   } catch (err) {
@@ -72,6 +99,8 @@ async function initializeApp() {
   try {
     applyMobileOptimizations();
 
+    await loadBootstrapData();
+
     await loadAppSettings();
 
     window.initializeLanguage();
@@ -107,7 +136,11 @@ async function loadSubscriptionData() {
 
     window.currentKeyName = keyName;
 
-    const data = await window.loadSubscription(keyName);
+    if (bootstrapData?.subscription_error) {
+      throw new Error(`HTTP ${bootstrapData.subscription_error}`);
+    }
+
+    const data = await window.loadSubscription(keyName, bootstrapData?.subscription);
 
     currentSubscriptionLink = data.link;
     window.currentSubscriptionLink = data.link;
@@ -120,8 +153,9 @@ async function loadSubscriptionData() {
 
     window.updateSubscriptionUI(data, keyName);
 
-    if (typeof window.initVlessSelector === 'function') {
-      await window.initVlessSelector(keyName);
+    // Селектор загружается отдельно и не задерживает показ страницы
+    if (appSettings?.vless_selector_enabled !== false && typeof window.initVlessSelector === 'function') {
+      window.initVlessSelector(keyName).catch((err) => console.error('vless-selector:', err));
     }
 
     const detectedOS = window.detectOperatingSystem();
@@ -181,6 +215,10 @@ function initializeUI() {
   }
   const shareBtn = document.getElementById('share-btn');
   if (shareBtn) {
+    // Скрипт меню «Поделиться» начинает грузиться при касании, до срабатывания click
+    shareBtn.addEventListener('pointerdown', () => {
+      window.loadFeature('share').catch(() => {});
+    }, { once: true });
     shareBtn.addEventListener('click', (e) => {
       e.preventDefault();
       window.onLinkCopy?.();
@@ -191,10 +229,6 @@ function initializeUI() {
   setupLinkHandler();
 
   setupSupportLinks();
-
-  if (window.initQRScanner) {
-    window.initQRScanner();
-  }
 }
 
 function setupLinkHandler() {
@@ -195,18 +195,6 @@
         return option;
     }
 
-    function renderCountries(menu, countries) {
-        if (!menu) {
-            return;
-        }
-        menu.innerHTML = '';
-        countries.forEach((country) => {
-            const option = createOptionElement(country);
-            menu.appendChild(option);
-        });
-        syncMenuWidth();
-    }
-
     async function initVlessSelector(keyName) {
         if (window.appSettings && window.appSettings.vless_selector_enabled === false) {
             const container = document.getElementById('vless-selector');
@@ -248,33 +236,62 @@
         renderPlaceholder(menu, getText('country_loading', 'Loading servers...'));
         container.hidden = true;
 
+        const keyRow = container.closest('.subscription-keyrow');
+        const countries = [];
+
+        // Страны приходят по мере ответа панелей, каждая встаёт на своё место
+        // по алфавиту (как при сортировке на сервере)
+        const addCountry = (country) => {
+            if (!country || !country.country) {
+                return;
+            }
+            if (countries.length === 0) {
+                menu.innerHTML = '';
+            }
+
+            let index = countries.findIndex((item) => country.country < item.country);
+            if (index === -1) {
+                index = countries.length;
+            }
+            countries.splice(index, 0, country);
+            menu.insertBefore(createOptionElement(country), menu.children[index] || null);
+
+            if (countries.length === 2) {
+                container.hidden = false;
+                if (keyRow) {
+                    keyRow.classList.add('vless-selector-visible');
+                }
+                attachTriggerListener(trigger);
+                attachGlobalListeners();
+            }
+            if (countries.length >= 2) {
+                syncMenuWidth();
+            }
+        };
+
         try {
-            const response = await window.api.getCountryLinks(keyName);
-            const countries = Array.isArray(response?.countries) ? response.countries : [];
+            if (typeof window.api.streamCountryLinks === 'function') {
+                await window.api.streamCountryLinks(keyName, addCountry);
+            } else {
+                const response = await window.api.getCountryLinks(keyName);
+                (Array.isArray(response?.countries) ? response.countries : []).forEach(addCountry);
+            }
 
-            if (!countries || countries.length <= 1) {
+            if (countries.length <= 1) {
                 container.hidden = true;
-                const keyRow = container.closest('.subscription-keyrow');
                 if (keyRow) {
                     keyRow.classList.remove('vless-selector-visible');
                 }
                 menu.innerHTML = '';
-                return;
             }
-
-            renderCountries(menu, countries);
-            container.hidden = false;
-            const keyRow = container.closest('.subscription-keyrow');
-            if (keyRow) {
-                keyRow.classList.add('vless-selector-visible');
-            }
-            attachTriggerListener(trigger);
-            attachGlobalListeners();
         } catch (error) {
             console.error('vless-selector: failed to load links', error);
+            // Уже показанные страны оставляем, если поток оборвался на середине
+            if (countries.length >= 2) {
+                return;
+            }
             renderPlaceholder(menu, getText('country_not_available', 'Servers are unavailable'));
             container.hidden = true;
-            const keyRow = container.closest('.subscription-keyrow');
             if (keyRow) {
                 keyRow.classList.remove('vless-selector-visible');
             }
@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import stat
+import tempfile
+
+import anyio
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+from .http_cache import ENCODING_PREFERENCE, MIN_COMPRESS_SIZE, etag_matches, select_encoding, variant_etag
+from .payloads import IMMUTABLE_CACHE, REVALIDATE_CACHE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".txt")
+
+SIBLING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Картинки, у которых может лежать .webp рядом
+WEBP_SOURCES = (".png", ".jpg", ".jpeg")
+
+mimetypes.add_type("image/webp", ".webp")
+
+
+def _compress(encoding, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def _file_etag(path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()}"'
+
+
+_umask = os.umask(0)
+os.umask(_umask)
+_FILE_MODE = 0o666 & ~_umask
+
+
+# Сжатые копии пишут все воркеры при старте: сначала во временный файл рядом, затем
+# атомарно подменяем, чтобы соседний воркер не отдал недописанный файл
+def _write_atomic(path, body: bytes):
+    directory, filename = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{filename}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        # mkstemp создаёт файл с правами 0600, а копия должна читаться так же, как оригинал
+        os.chmod(temp_path, _FILE_MODE)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+# StaticFiles с заранее сжатыми копиями (.br/.gz рядом с исходником), сильными ETag
+# и долгим кешем для ссылок вида ?v=<текущая версия>
+class PrecompressedStaticFiles(StaticFiles):
+    def __init__(self, *, directory, version=None, precompress=True, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.version = version
+        self.encodings = tuple(
+            encoding for encoding in ENCODING_PREFERENCE if encoding != "br" or brotli is not None
+        )
+        # Полный путь -> (mtime_ns, size, etag, доступные сжатые копии)
+        self._entries = {}
+        if precompress:
+            self.precompress()
+
+    def precompress(self):
+        created = 0
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                source = _stat(path)
+                if source is None or source.st_size < MIN_COMPRESS_SIZE:
+                    continue
+
+                body = None
+                for encoding in self.encodings:
+                    sibling_path = path + SIBLING_SUFFIXES[encoding]
+                    sibling = _stat(sibling_path)
+                    if sibling is not None and sibling.st_mtime_ns >= source.st_mtime_ns:
+                        continue
+                    try:
+                        if body is None:
+                            with open(path, "rb") as f:
+                                body = f.read()
+                        _write_atomic(sibling_path, _compress(encoding, body))
+                        created += 1
+                    except OSError as e:
+                        # Папка только для чтения: отдаём файлы без сжатия
+                        logging.warning(f"[Subscription Page] Cannot write compressed static files: {e}")
+                        return created
+        if created:
+            logging.info(f"[Subscription Page] Compressed static files written: {created}")
+        return created
+
+    def _entry(self, full_path, stat_result):
+        entry = self._entries.get(full_path)
+        if entry is not None and entry[0] == stat_result.st_mtime_ns and entry[1] == stat_result.st_size:
+            return entry
+
+        encodings = ()
+        if full_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            # Устаревшая сжатая копия (исходник правили после сжатия) не отдаётся
+            encodings = tuple(
+                encoding for encoding in self.encodings
+                if (sibling := _stat(full_path + SIBLING_SUFFIXES[encoding])) is not None
+                and sibling.st_mtime_ns >= stat_result.st_mtime_ns
+            )
+        entry = (stat_result.st_mtime_ns, stat_result.st_size, _file_etag(full_path), encodings)
+        self._entries[full_path] = entry
+        return entry
+
+    def _webp_variant(self, full_path):
+        base, extension = os.path.splitext(full_path)
+        if extension.lower() not in WEBP_SOURCES:
+            return None, None
+        webp_path = base + ".webp"
+        webp_stat = _stat(webp_path)
+        if webp_stat is None or not stat.S_ISREG(webp_stat.st_mode):
+            return None, None
+        return webp_path, webp_stat
+
+    def _resolve(self, path, accept):
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        vary = None
+        webp_path, webp_stat = self._webp_variant(full_path)
+        if webp_path is not None:
+            vary = "Accept"
+            if "image/webp" in accept:
+                full_path, stat_result = webp_path, webp_stat
+
+        return full_path, stat_result, vary, self._entry(full_path, stat_result)
+
+    async def get_response(self, path, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        request = Request(scope)
+        resolved = await anyio.to_thread.run_sync(self._resolve, path, request.headers.get("accept", ""))
+        if resolved is None:
+            # 404, каталоги и html-режим остаются на стандартной логике
+            return await super().get_response(path, scope)
+
+        full_path, stat_result, vary, (_, _, etag, encodings) = resolved
+        encoding = select_encoding(request.headers.get("accept-encoding"), encodings)
+        if encodings:
+            vary = "Accept-Encoding"
+
+        requested_version = request.query_params.get("v")
+        versioned = self.version is not None and requested_version == self.version
+        headers = {
+            "ETag": variant_etag(etag, encoding),
+            "Cache-Control": IMMUTABLE_CACHE if versioned else REVALIDATE_CACHE,
+        }
+        if vary:
+            headers["Vary"] = vary
+
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            serve_path = full_path + SIBLING_SUFFIXES[encoding]
+            return FileResponse(serve_path, media_type=media_type, headers=headers)
+        return FileResponse(full_path, stat_result=stat_result, media_type=media_type, headers=headers)
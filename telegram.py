@@ -1,12 +1,23 @@
+import importlib.util
 import logging
+import os
+import time
 from aiogram import Router
 from aiogram.types import InlineKeyboardButton, WebAppInfo
 from config import WEBHOOK_HOST
 from .settings import MODULE_ENABLED, BUTTON_MODE, CONNECT_DEVICE_WEB, CONNECT_DEVICE_EXTRA, BASE_PATH, WEBAPP_DOMAIN, CDN_DOMAIN
+from .cache import invalidate_key
 
 BACKEND_DOMAIN = WEBAPP_DOMAIN if WEBAPP_DOMAIN else WEBHOOK_HOST
 BUTTON_DOMAIN = CDN_DOMAIN if CDN_DOMAIN else BACKEND_DOMAIN
 
+# Сколько адресов передавать в одном IN (...): у PostgreSQL ограничение на число параметров запроса
+FINAL_LINKS_CHUNK = 10000
+
+# Сколько секунд помнить кнопки, подготовленные zero_traffic_notification_batch_hook
+ZERO_TRAFFIC_PREFETCH_TTL = 600
+_prefetched_buttons = {}
+
 
 async def _get_final_link(session, key_name):
     if not session or not key_name:
@@ -30,39 +41,68 @@ def create_telegram_router():
     router = Router()
     return router
 
-async def _is_vless_key(session, key):
-    try:
-        from modules.one_subs.router import is_vless_key
-        return await is_vless_key(session, key)
-    except ImportError:
+ONE_SUBS_SETTINGS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "modules", "one_subs", "settings.py"
+)
+
+# Файл настроек one_subs перечитывается, только если изменилось время его изменения
+_one_subs_state = {"mtime": None, "enabled": False}
+
+_NOT_LOADED = object()
+_vless_checker = _NOT_LOADED
+
+def _get_vless_checker():
+    # Импорт one_subs пробуем один раз, а не на каждый ключ
+    global _vless_checker
+    if _vless_checker is _NOT_LOADED:
         try:
-            link = getattr(key, 'key', None) or getattr(key, 'remnawave_link', None)
-            if link and link.lower().startswith("vless://"):
-                return True
-        except:
-            pass
-    return False
+            from modules.one_subs.router import is_vless_key
+            _vless_checker = is_vless_key
+        except ImportError:
+            _vless_checker = None
+    return _vless_checker
+
+def _is_vless_link(key):
+    link = getattr(key, 'key', None) or getattr(key, 'remnawave_link', None)
+    return bool(link) and isinstance(link, str) and link.lower().startswith("vless://")
+
+async def _non_vless_keys(session, keys, limit):
+    # Проход по всем ключам за раз; останавливается, как только найдено limit не-VLESS ключей
+    checker = _get_vless_checker()
+    found = []
+    for key in keys:
+        is_vless = await checker(session, key) if checker is not None else _is_vless_link(key)
+        if not is_vless:
+            found.append(key)
+            if len(found) >= limit:
+                break
+    return found
 
 def _check_one_subs_enabled():
     try:
-        import importlib.util
-        import os
-
-        one_subs_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "modules", "one_subs", "settings.py"
-        )
-
-        if os.path.exists(one_subs_path):
-            spec = importlib.util.spec_from_file_location("one_subs_settings", one_subs_path)
-            if spec and spec.loader:
-                one_subs_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(one_subs_module)
-                return getattr(one_subs_module, 'ENABLED', False)
+        mtime = os.stat(ONE_SUBS_SETTINGS_PATH).st_mtime_ns
+    except OSError:
+        _one_subs_state["mtime"] = None
+        _one_subs_state["enabled"] = False
+        return False
+
+    if mtime == _one_subs_state["mtime"]:
+        return _one_subs_state["enabled"]
+
+    enabled = False
+    try:
+        spec = importlib.util.spec_from_file_location("one_subs_settings", ONE_SUBS_SETTINGS_PATH)
+        if spec and spec.loader:
+            one_subs_module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(one_subs_module)
+            enabled = getattr(one_subs_module, 'ENABLED', False)
     except Exception as e:
         logging.debug(f"[Subscription Page] Не удалось проверить one_subs: {e}")
 
-    return False
+    _one_subs_state["mtime"] = mtime
+    _one_subs_state["enabled"] = enabled
+    return enabled
 
 def _create_connect_buttons(key_name, hook_name, final_link=None):
     buttons = []
@@ -126,37 +166,22 @@ async def profile_menu_hook(chat_id: int, admin: bool, session, **kwargs):
         return []
 
     try:
-        from database import get_key_count, get_keys
-
-        key_count = await get_key_count(session, chat_id)
-
-        if key_count == 0:
+        # Без one_subs кнопка в профиле не нужна, в базу можно не ходить
+        if not _check_one_subs_enabled():
             return []
 
+        from database import get_keys
+
         keys = await get_keys(session, chat_id)
         if not keys:
             return []
 
-        one_subs_enabled = _check_one_subs_enabled()
-
-        if not one_subs_enabled:
-            return []
-
-        non_vless_count = 0
-        target_key = None
-
-        for key in keys:
-            is_vless = await _is_vless_key(session, key)
-            if not is_vless:
-                non_vless_count += 1
-                if target_key is None:
-                    target_key = key
-
-        if non_vless_count > 1:
+        # Кнопка показывается, только если не-VLESS ключ не больше одного
+        non_vless = await _non_vless_keys(session, keys, limit=2)
+        if len(non_vless) > 1:
             return []
 
-        if target_key is None:
-            target_key = keys[0]
+        target_key = non_vless[0] if non_vless else keys[0]
 
         key_name = getattr(target_key, 'email', '') or str(target_key)
         final_link = getattr(target_key, 'key', None) or getattr(target_key, 'remnawave_link', None)
@@ -187,6 +212,8 @@ async def key_creation_complete_hook(**kwargs):
     try:
         key_name = kwargs.get("key_name")
         session = kwargs.get("session")
+        # Ключ создан или изменён: ни страница подписки, ни рассылка не должны отдавать старую ссылку
+        _invalidate_key(key_name)
         final_link = await _get_final_link(session, key_name)
         return _create_connect_buttons(key_name, "key_creation_complete_hook", final_link)
     except Exception as e:
@@ -199,6 +226,10 @@ async def zero_traffic_notification_hook(**kwargs):
 
     try:
         email = kwargs.get("email")
+        prefetched = _take_prefetched_buttons(email)
+        if prefetched is not None:
+            return prefetched
+
         session = kwargs.get("session")
         final_link = await _get_final_link(session, email)
         return _create_connect_buttons(email, "zero_traffic_notification_hook", final_link)
@@ -206,6 +237,72 @@ async def zero_traffic_notification_hook(**kwargs):
         logging.error(f"[Subscription Page] Ошибка в zero_traffic_notification_hook: {e}")
         return []
 
+async def _get_final_links(session, emails):
+    from sqlalchemy import select
+    from database.models import Key
+
+    links = {}
+    for start in range(0, len(emails), FINAL_LINKS_CHUNK):
+        chunk = emails[start:start + FINAL_LINKS_CHUNK]
+        result = await session.execute(select(Key).where(Key.email.in_(chunk)))
+        for key in result.scalars().all():
+            # Тот же порядок, что в _get_final_link (get_key_details): link, remnawave_link, key
+            link = getattr(key, "link", None) or getattr(key, "remnawave_link", None) or getattr(key, "key", None)
+            links.setdefault(key.email, link)
+    return links
+
+async def zero_traffic_notification_batch_hook(**kwargs):
+    # Кнопки для всей рассылки сразу: ссылки берутся одним запросом IN (...) вместо запроса на каждого
+    # получателя. Готовые кнопки также запоминаются, и zero_traffic_notification_hook для этих
+    # адресов в течение ZERO_TRAFFIC_PREFETCH_TTL секунд не ходит в базу
+    if not MODULE_ENABLED:
+        return {}
+
+    # Записи прошлых рассылок, которые так и не забрали, не должны копиться
+    _purge_prefetched_buttons()
+    emails = list(dict.fromkeys(email for email in kwargs.get("emails") or () if email))
+    session = kwargs.get("session")
+    if not emails:
+        return {}
+
+    try:
+        links = await _get_final_links(session, emails) if session else {}
+    except Exception as e:
+        logging.error(f"[Subscription Page] Ошибка получения ссылок для рассылки: {e}")
+        links = {}
+
+    result = {
+        email: _create_connect_buttons(email, "zero_traffic_notification_batch_hook", links.get(email))
+        for email in emails
+    }
+
+    expires_at = time.monotonic() + ZERO_TRAFFIC_PREFETCH_TTL
+    _prefetched_buttons.update((email, (expires_at, buttons)) for email, buttons in result.items())
+    return result
+
+def _purge_prefetched_buttons():
+    now = time.monotonic()
+    for stale in [key for key, (expiry, _) in _prefetched_buttons.items() if expiry < now]:
+        del _prefetched_buttons[stale]
+
+def _invalidate_key(key_name):
+    invalidate_key(key_name)
+    if key_name:
+        _prefetched_buttons.pop(key_name, None)
+
+def _take_prefetched_buttons(email):
+    if not email or not _prefetched_buttons:
+        return None
+    entry = _prefetched_buttons.pop(email, None)
+    if entry is None:
+        return None
+    expires_at, buttons = entry
+    if expires_at < time.monotonic():
+        # Рассылка давно закончилась: выбрасываем все устаревшие записи разом
+        _purge_prefetched_buttons()
+        return None
+    return buttons
+
 def create_xui_subpage_buttons(key):
     buttons = []
 
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select
+from database.models import Server
+
+from .metrics import db_session_latency
+from .settings import TOPOLOGY_REFRESH_INTERVAL
+
+SERVER_FIELDS = (
+    "server_name", "cluster_name", "tariff_group", "api_url",
+    "subscription_url", "inbound_id", "panel_type", "enabled",
+)
+
+
+# Снимок строки Server, не привязанный к сессии
+class ServerRef:
+    __slots__ = SERVER_FIELDS
+
+    def __init__(self, row):
+        for field in SERVER_FIELDS:
+            setattr(self, field, getattr(row, field, None))
+
+    def is_enabled_xui(self):
+        return self.enabled is True and (self.panel_type or '').lower() == '3x-ui'
+
+
+# Индекс серверов в памяти: server_id ключа -> включенные 3x-ui серверы его тарифной группы.
+# Повторяет порядок разрешения, который раньше выполнялся SQL-запросами на каждый запрос
+class TopologyIndex:
+    def __init__(self, refresh_interval=TOPOLOGY_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.built_at = None
+        self.server_count = 0
+        self._by_name = {}
+        self._first_by_group = {}
+        self._tariff_by_cluster = {}
+        self._xui_by_group = {}
+        self._xui_by_cluster = {}
+        self._resolved = {}
+        self._refresh_task = None
+
+    def _build(self, rows):
+        by_name = {}
+        first_by_group = {}
+        tariff_by_cluster = {}
+        xui_by_group = {}
+        xui_by_cluster = {}
+
+        for row in rows:
+            server = ServerRef(row)
+            if server.cluster_name is not None:
+                by_name.setdefault(server.cluster_name, server)
+                tariff_by_cluster.setdefault(server.cluster_name, server.tariff_group)
+            if server.server_name is not None:
+                by_name.setdefault(server.server_name, server)
+            if server.tariff_group is not None:
+                first_by_group.setdefault(server.tariff_group, server)
+
+            if server.is_enabled_xui():
+                if server.tariff_group:
+                    xui_by_group.setdefault(server.tariff_group, []).append(server)
+                if server.cluster_name:
+                    xui_by_cluster.setdefault(server.cluster_name, []).append(server)
+
+        self._by_name = by_name
+        self._first_by_group = first_by_group
+        self._tariff_by_cluster = tariff_by_cluster
+        self._xui_by_group = {group: tuple(items) for group, items in xui_by_group.items()}
+        self._xui_by_cluster = {cluster: tuple(items) for cluster, items in xui_by_cluster.items()}
+        self._resolved = {}
+        self.server_count = len(rows)
+        self.built_at = time.monotonic()
+
+    async def refresh(self, session_maker):
+        with db_session_latency.time("topology_refresh"):
+            async with session_maker() as session:
+                result = await session.execute(select(Server))
+                rows = result.scalars().all()
+        self._build(rows)
+        logging.info(
+            f"[Subscription Page] Server topology rebuilt: {self.server_count} servers, "
+            f"{len(self._xui_by_group)} tariff groups"
+        )
+
+    async def _background_refresh(self, session_maker):
+        try:
+            await self.refresh(session_maker)
+        except Exception as e:
+            logging.error(f"[Subscription Page] Server topology refresh failed: {e}")
+        finally:
+            self._refresh_task = None
+
+    async def ensure_ready(self, session_maker):
+        if self.built_at is None:
+            await self.refresh(session_maker)
+            return
+
+        # Устаревший индекс продолжает отвечать, пока новый строится в фоне
+        if self.age() >= self.refresh_interval and self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._background_refresh(session_maker))
+
+    def servers_for(self, server_identifier):
+        if not server_identifier:
+            return ()
+
+        resolved = self._resolved.get(server_identifier)
+        if resolved is not None:
+            return resolved
+
+        base_server = self._by_name.get(server_identifier) or self._first_by_group.get(server_identifier)
+
+        tariff_group = base_server.tariff_group if base_server else None
+        cluster_name = (base_server.cluster_name if base_server else None) or server_identifier
+
+        if not tariff_group:
+            tariff_group = self._tariff_by_cluster.get(server_identifier)
+
+        if tariff_group:
+            resolved = self._xui_by_group.get(tariff_group, ())
+        else:
+            resolved = self._xui_by_cluster.get(cluster_name, ())
+
+        self._resolved[server_identifier] = resolved
+        return resolved
+
+    def age(self):
+        if self.built_at is None:
+            return None
+        return time.monotonic() - self.built_at
+
+    def stats(self):
+        age = self.age()
+        return {
+            "servers": self.server_count,
+            "tariff_groups": len(self._xui_by_group),
+            "clusters": len(self._xui_by_cluster),
+            "age_seconds": round(age, 1) if age is not None else None,
+        }
+
+
+topology = TopologyIndex()
@@ -0,0 +1,107 @@
+import contextvars
+import json
+import logging
+import random
+import time
+
+from .settings import SERVER_TIMING_ENABLED, TRACE_SAMPLE_RATE
+
+# Разбивка времени запроса по этапам (запрос к базе, логин в панель, ссылка VLESS...).
+# Трасса живёт в contextvar: задачи asyncio, созданные внутри запроса (опрос панелей
+# параллельно), пишут этапы в ту же трассу. Вне трассы span() почти ничего не стоит
+
+_current = contextvars.ContextVar("subpage_trace", default=None)
+
+
+class Trace:
+    __slots__ = ("route", "started", "spans", "sampled")
+
+    def __init__(self, route, sampled):
+        self.route = route
+        self.started = time.perf_counter()
+        # имя этапа -> [суммарное время в секундах, количество]
+        self.spans = {}
+        self.sampled = sampled
+
+    def add(self, name, elapsed):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+
+    def server_timing(self):
+        # Параллельные этапы (несколько панелей) складываются, поэтому рядом указано число вызовов
+        parts = []
+        for name, (elapsed, count) in self.spans.items():
+            part = f"{name};dur={elapsed * 1000:.1f}"
+            if count > 1:
+                part += f';desc="x{count}"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def record(self, status):
+        return {
+            "route": self.route,
+            "status": status,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "spans": {
+                name: {"ms": round(elapsed * 1000, 2), "count": count}
+                for name, (elapsed, count) in self.spans.items()
+            },
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    trace = _current.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name)
+
+
+# Начинает трассу для запроса. None, если не нужны ни заголовок, ни запись в лог
+def start(route):
+    sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    if not SERVER_TIMING_ENABLED and not sampled:
+        return None
+    trace = Trace(route, sampled)
+    _current.set(trace)
+    return trace
+
+
+def finish(trace, response):
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = trace.server_timing()
+    if trace.sampled:
+        logging.info(f"[Subscription Page] trace {json.dumps(trace.record(response.status_code))}")
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from urllib.parse import quote
+
+from .settings import (
+    HAPP_TV_API_URL, HAPP_TV_CONCURRENCY, HAPP_TV_CONNECT_TIMEOUT, HAPP_TV_TIMEOUT, HAPP_TV_RETRIES
+)
+
+
+# Один долгоживущий httpx-клиент с пулом соединений для отправки подписки на TV через Happ.
+# Открывается и закрывается вместе с приложением, число одновременных запросов ограничено
+class HappTVClient:
+    RETRY_BACKOFF = 0.3
+
+    def __init__(self, base_url, concurrency, connect_timeout, timeout, retries):
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._client = None
+
+    async def start(self):
+        if self._client is not None:
+            return
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def send(self, code, subscription_data):
+        import httpx
+
+        await self.start()
+        url = f"{self.base_url}{quote(str(code), safe='')}"
+
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                try:
+                    return await self._client.post(url, json={"data": subscription_data})
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    # Запрос до сервера не дошёл, поэтому повтор безопасен
+                    if attempt >= self.retries:
+                        raise
+                    delay = self.RETRY_BACKOFF * (2 ** attempt)
+                    attempt += 1
+                    logging.warning(
+                        f"[Subscription Page] Happ API connection failed ({e}), retry {attempt}/{self.retries} in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+
+
+tv_client = HappTVClient(
+    HAPP_TV_API_URL, HAPP_TV_CONCURRENCY, HAPP_TV_CONNECT_TIMEOUT, HAPP_TV_TIMEOUT, HAPP_TV_RETRIES
+)
@@ -0,0 +1,178 @@
+import logging
+import os
+import re
+import urllib.request
+
+# Сторонние библиотеки страницы. local - путь внутри static/, cdn - откуда они
+# грузились раньше и откуда скачиваются командой ниже
+# jsQR нужен только сканеру QR и загружается вместе с ним (feature)
+JSQR = {
+    "name": "jsqr",
+    "kind": "script",
+    "feature": "qr-scanner",
+    "local": "vendor/jsqr/jsQR.js",
+    "cdn": "https://cdn.jsdelivr.net/npm/jsqr@1.4.0/dist/jsQR.js",
+}
+
+FONT_AWESOME = {
+    "name": "fontawesome",
+    "kind": "style",
+    "local": "vendor/fontawesome/css/fontawesome.css",
+    "cdn": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css",
+}
+
+VENDOR_ASSETS = (JSQR, FONT_AWESOME)
+
+# all.css ссылается на шрифты как ../webfonts/<файл>
+FONT_AWESOME_WEBFONTS = ("fa-solid-900.woff2", "fa-brands-400.woff2", "fa-regular-400.woff2")
+FONT_AWESOME_WEBFONTS_DIR = "vendor/fontawesome/webfonts"
+FONT_AWESOME_WEBFONTS_URL = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/webfonts/"
+
+ICON_RE = re.compile(r"\bfa-[a-z0-9-]+")
+FA_ICON_RULE_RE = re.compile(r"""([^{}]+)\{(content|--fa):\s*"([^"]+)"\}""")
+FA_SELECTOR_RE = re.compile(r"^\.(fa-[a-z0-9-]+):{1,2}before$")
+
+SOURCE_EXTENSIONS = (".html", ".js", ".py")
+
+
+def resolve_vendor_assets(static_path, enabled=True):
+    # Для каждой библиотеки: брать локальную копию или CDN. Если локального файла нет,
+    # библиотека остаётся на CDN, чтобы страница не сломалась до запуска команды скачивания
+    resolved = []
+    for asset in VENDOR_ASSETS:
+        local = enabled and os.path.isfile(os.path.join(static_path, asset["local"]))
+        if enabled and not local:
+            logging.warning(
+                f"[Subscription Page] {asset['local']} not found, {asset['name']} is loaded from CDN. "
+                f"Run vendor.py to download it"
+            )
+        resolved.append((asset, local))
+    return resolved
+
+
+def _vendor_url(base_path, version, asset, local):
+    if local:
+        return f"{base_path}static/{asset['local']}?v={version}", asset["kind"]
+    return asset["cdn"], asset["kind"]
+
+
+def vendor_tags(base_path, version, resolved):
+    tags = []
+    for asset, local in resolved:
+        if asset.get("feature"):
+            continue
+        url, kind = _vendor_url(base_path, version, asset, local)
+        if kind == "script":
+            tags.append(f'<script src="{url}"></script>')
+        else:
+            tags.append(f'<link rel="stylesheet" href="{url}">')
+    return "\n    ".join(tags)
+
+
+# Библиотеки, которые загружаются вместе с частью страницы, а не в <head>
+def vendor_feature_scripts(base_path, version, resolved):
+    scripts = {}
+    for asset, local in resolved:
+        if asset.get("feature"):
+            url, _ = _vendor_url(base_path, version, asset, local)
+            scripts.setdefault(asset["feature"], []).append(url)
+    return scripts
+
+
+def _origin(url):
+    scheme, _, rest = url.partition("://")
+    return f"{scheme}://{rest.split('/', 1)[0]}"
+
+
+def content_security_policy(resolved):
+    script_sources = ["'self'", "'unsafe-inline'", "https://telegram.org"]
+    style_sources = ["'self'", "'unsafe-inline'"]
+    font_sources = ["'self'"]
+    for asset, local in resolved:
+        if local:
+            continue
+        origin = _origin(asset["cdn"])
+        if asset["kind"] == "script":
+            script_sources.append(origin)
+        else:
+            style_sources.append(origin)
+            font_sources.append(origin)
+    return (
+        "frame-ancestors 'self' https://web.telegram.org https://telegram.org; "
+        f"script-src {' '.join(dict.fromkeys(script_sources))}; "
+        f"style-src {' '.join(dict.fromkeys(style_sources))}; "
+        f"font-src {' '.join(dict.fromkeys(font_sources))}; "
+        "object-src 'none'; base-uri 'self'"
+    )
+
+
+def _iter_sources(module_path):
+    paths = [os.path.join(module_path, name) for name in sorted(os.listdir(module_path)) if name.endswith(".py")]
+    for dirpath, dirnames, filenames in os.walk(os.path.join(module_path, "static")):
+        # Сторонние файлы и собранные бандлы не сканируем
+        dirnames[:] = [name for name in dirnames if name not in ("vendor", "dist")]
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(SOURCE_EXTENSIONS))
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield f.read()
+
+
+def used_icons(sources):
+    icons = set()
+    for source in sources:
+        icons.update(ICON_RE.findall(source))
+    return icons
+
+
+# Из полного all.css Font Awesome остаются общие правила и только используемые иконки
+def build_font_awesome_subset(css, icons):
+    parts = []
+    position = 0
+    for match in FA_ICON_RULE_RE.finditer(css):
+        parts.append(css[position:match.start()])
+        position = match.end()
+
+        selectors = [selector.strip() for selector in match.group(1).split(",")]
+        names = [FA_SELECTOR_RE.match(selector) for selector in selectors]
+        if not all(names):
+            # Не правило иконки, а, например, .fa-stack или анимация
+            parts.append(match.group(0))
+            continue
+        kept = [selector for selector, name in zip(selectors, names) if name.group(1) in icons]
+        if kept:
+            parts.append(f'{",".join(kept)}{{{match.group(2)}:"{match.group(3)}"}}')
+    parts.append(css[position:])
+    return "".join(parts)
+
+
+def _download(url):
+    request = urllib.request.Request(url, headers={"User-Agent": "xui-subpage-vendor"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _write(path, body: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+    logging.info(f"[Subscription Page] {path}: {len(body)} bytes")
+
+
+def vendor_all(module_path):
+    static_path = os.path.join(module_path, "static")
+    sources = list(_iter_sources(module_path))
+
+    _write(os.path.join(static_path, JSQR["local"]), _download(JSQR["cdn"]))
+
+    css = _download(FONT_AWESOME["cdn"]).decode("utf-8")
+    subset = build_font_awesome_subset(css, used_icons(sources))
+    _write(os.path.join(static_path, FONT_AWESOME["local"]), subset.encode("utf-8"))
+    for font in FONT_AWESOME_WEBFONTS:
+        _write(os.path.join(static_path, FONT_AWESOME_WEBFONTS_DIR, font), _download(FONT_AWESOME_WEBFONTS_URL + font))
+
+
+# Скачать сторонние библиотеки в static/vendor (нужен доступ к CDN один раз):
+#   python modules/xui_subpage/vendor.py
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    vendor_all(os.path.dirname(os.path.abspath(__file__)))
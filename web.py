@@ -0,0 +1,30 @@
+import os
+from fastapi import FastAPI
+from .settings import BASE_PATH, STATIC_PRECOMPRESS
+
+if not BASE_PATH.endswith('/'):
+    BASE_PATH = BASE_PATH + '/'
+from .api import create_api_routes, lifespan
+from .static_files import PrecompressedStaticFiles
+
+MODULE_PATH = os.path.dirname(__file__)
+STATIC_PATH = os.path.join(MODULE_PATH, "static")
+
+def get_version():
+    version_file = os.path.join(MODULE_PATH, "VERSION")
+    try:
+        with open(version_file, "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return "1.0.0"
+
+def create_app():
+    app = FastAPI(title="3X-UI Subscription Page", version=get_version(), lifespan=lifespan)
+    create_api_routes(app, MODULE_PATH)
+    if os.path.exists(STATIC_PATH):
+        app.mount(f"{BASE_PATH}static", PrecompressedStaticFiles(
+            directory=STATIC_PATH, version=get_version(), precompress=STATIC_PRECOMPRESS
+        ), name="static")
+    return app
+
+app = create_app()